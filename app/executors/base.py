@@ -174,11 +174,11 @@ class BaseExecutor(ABC):
             OTPコード、取得できなかった場合はNone
         """
         from app.services.otp_service import get_otp_service
-        from app.models.otp_schemas import OTP_FIELD_SELECTORS, OTP_PAGE_INDICATORS
+        from app.models.otp_schemas import OTP_FIELD_SELECTORS, OTP_PAGE_INDICATOR_RE
         
         # OTP入力画面かどうか確認
         page_text = await page.inner_text("body")
-        is_otp_page = any(indicator in page_text for indicator in OTP_PAGE_INDICATORS)
+        is_otp_page = OTP_PAGE_INDICATOR_RE.search(page_text) is not None
         
         if not is_otp_page:
             return None
@@ -240,11 +240,11 @@ class BaseExecutor(ABC):
         Returns:
             OTP入力画面の場合True
         """
-        from app.models.otp_schemas import OTP_PAGE_INDICATORS
+        from app.models.otp_schemas import OTP_PAGE_INDICATOR_RE
         
         try:
             page_text = await page.inner_text("body")
-            return any(indicator in page_text for indicator in OTP_PAGE_INDICATORS)
+            return OTP_PAGE_INDICATOR_RE.search(page_text) is not None
         except Exception:
             return False
     
@@ -449,11 +449,26 @@ class ProductExecutor(BaseExecutor):
 class ExecutorFactory:
     """Executorのファクトリークラス"""
     
-    @staticmethod
-    def get_executor(category: str, service_name: Optional[str] = None) -> BaseExecutor:
+    # 固定のExecutor（train/bus/amazon/rakuten/voice）のみ保持する共有インスタンス
+    _shared_executors: dict[str, BaseExecutor] = {}
+    
+    @classmethod
+    def _get_shared(cls, key: str, executor_class: type[BaseExecutor]) -> BaseExecutor:
+        """キーごとに1つだけ生成したExecutorを返す"""
+        executor = cls._shared_executors.get(key)
+        if executor is None:
+            executor = cls._shared_executors[key] = executor_class()
+        return executor
+    
+    @classmethod
+    def get_executor(cls, category: str, service_name: Optional[str] = None) -> BaseExecutor:
         """
         カテゴリに応じたExecutorを取得
         
+        Executorはタスクごとの状態を持たないため、固定のExecutorは共有インスタンスを
+        再利用する。任意のservice_nameを取るProductExecutor/GenericExecutorは
+        キャッシュが際限なく増えないよう毎回生成する
+        
         Args:
             category: カテゴリ（train, bus, flight, product等）
             service_name: サービス名（amazon, rakuten等）
@@ -463,10 +478,10 @@ class ExecutorFactory:
         """
         if category == "train":
             from app.executors.ex_reservation_executor import EXReservationExecutor
-            return EXReservationExecutor()
+            return cls._get_shared("train", EXReservationExecutor)
         elif category == "bus":
             from app.executors.highway_bus_executor import HighwayBusExecutor
-            return HighwayBusExecutor()
+            return cls._get_shared("bus", HighwayBusExecutor)
         elif category == "flight":
             # 将来的にFlightExecutorを実装
             return GenericExecutor()
@@ -474,15 +489,15 @@ class ExecutorFactory:
             # サービスに応じたExecutorを返す
             if service_name == "amazon":
                 from app.executors.amazon_executor import AmazonExecutor
-                return AmazonExecutor()
+                return cls._get_shared("amazon", AmazonExecutor)
             elif service_name == "rakuten":
                 from app.executors.rakuten_executor import RakutenExecutor
-                return RakutenExecutor()
+                return cls._get_shared("rakuten", RakutenExecutor)
             else:
                 return ProductExecutor(service_name=service_name or "amazon")
         elif category in ("voice", "phone", "call"):
             # 電話タスク用Executor
             from app.executors.voice_executor import VoiceExecutor
-            return VoiceExecutor()
+            return cls._get_shared("voice", VoiceExecutor)
         else:
             return GenericExecutor()
@@ -112,6 +112,104 @@ class HighwayBusExecutor(BaseExecutor):
         "require_special": False,
     }
     
+    # 都市名・都道府県名から英語表記へのマッピング
+    # 注意: 将来的にはAIが動的に判断するか、WILLERのAPIを使用する方が良い
+    CITY_MAP = {
+        # 関東
+        "東京": "tokyo",
+        "tokyo": "tokyo",
+        "新宿": "tokyo",
+        "shinjuku": "tokyo",
+        "池袋": "tokyo",
+        "ikebukuro": "tokyo",
+        "横浜": "kanagawa/yokohama",
+        "yokohama": "kanagawa/yokohama",
+        "神奈川": "kanagawa",
+        "kanagawa": "kanagawa",
+        "千葉": "chiba",
+        "chiba": "chiba",
+        "埼玉": "saitama",
+        "saitama": "saitama",
+        "大宮": "saitama/omiya",
+        "omiya": "saitama/omiya",
+        # 関西
+        "大阪": "osaka",
+        "osaka": "osaka",
+        "梅田": "osaka",  # 大阪梅田
+        "umeda": "osaka",
+        "難波": "osaka",
+        "namba": "osaka",
+        "京都": "kyoto",
+        "kyoto": "kyoto",
+        "神戸": "hyogo/kobe",
+        "kobe": "hyogo/kobe",
+        "兵庫": "hyogo",
+        "hyogo": "hyogo",
+        "奈良": "nara",
+        "nara": "nara",
+        # 中部
+        "名古屋": "aichi/nagoya",
+        "愛知": "aichi",
+        "静岡": "shizuoka",
+        "長野": "nagano",
+        "新潟": "niigata",
+        "金沢": "ishikawa/kanazawa",
+        "石川": "ishikawa",
+        "富山": "toyama",
+        # 東北
+        "仙台": "miyagi/sendai",
+        "宮城": "miyagi",
+        "福島": "fukushima",
+        "山形": "yamagata",
+        "青森": "aomori",
+        "秋田": "akita",
+        "盛岡": "iwate/morioka",
+        "岩手": "iwate",
+        # 中国・四国
+        "広島": "hiroshima",
+        "hiroshima": "hiroshima",
+        "岡山": "okayama",
+        "okayama": "okayama",
+        "鳥取": "tottori",
+        "tottori": "tottori",
+        "米子": "tottori",  # 米子は鳥取県
+        "yonago": "tottori",
+        "島根": "shimane",
+        "shimane": "shimane",
+        "松江": "shimane/matsue",
+        "matsue": "shimane/matsue",
+        "出雲": "shimane",
+        "izumo": "shimane",
+        "山口": "yamaguchi",
+        "yamaguchi": "yamaguchi",
+        "高松": "kagawa/takamatsu",
+        "takamatsu": "kagawa/takamatsu",
+        "香川": "kagawa",
+        "kagawa": "kagawa",
+        "松山": "ehime/matsuyama",
+        "matsuyama": "ehime/matsuyama",
+        "愛媛": "ehime",
+        "ehime": "ehime",
+        "高知": "kochi",
+        "kochi": "kochi",
+        "徳島": "tokushima",
+        "tokushima": "tokushima",
+        # 九州
+        "福岡": "fukuoka",
+        "博多": "fukuoka",
+        "北九州": "fukuoka/kitakyushu",
+        "熊本": "kumamoto",
+        "長崎": "nagasaki",
+        "大分": "oita",
+        "鹿児島": "kagoshima",
+        "宮崎": "miyazaki",
+        "佐賀": "saga",
+        # 北海道
+        "札幌": "hokkaido/sapporo",
+        "北海道": "hokkaido",
+    }
+    
+    
     def __init__(self):
         """Executorを初期化"""
         super().__init__()
@@ -320,106 +418,9 @@ class HighwayBusExecutor(BaseExecutor):
         Returns:
             検索URL
         """
-        # 都市名・都道府県名から英語表記へのマッピング
-        # 注意: 将来的にはAIが動的に判断するか、WILLERのAPIを使用する方が良い
-        city_map = {
-            # 関東
-            "東京": "tokyo",
-            "tokyo": "tokyo",
-            "新宿": "tokyo",
-            "shinjuku": "tokyo",
-            "池袋": "tokyo",
-            "ikebukuro": "tokyo",
-            "横浜": "kanagawa/yokohama",
-            "yokohama": "kanagawa/yokohama",
-            "神奈川": "kanagawa",
-            "kanagawa": "kanagawa",
-            "千葉": "chiba",
-            "chiba": "chiba",
-            "埼玉": "saitama",
-            "saitama": "saitama",
-            "大宮": "saitama/omiya",
-            "omiya": "saitama/omiya",
-            # 関西
-            "大阪": "osaka",
-            "osaka": "osaka",
-            "梅田": "osaka",  # 大阪梅田
-            "umeda": "osaka",
-            "難波": "osaka",
-            "namba": "osaka",
-            "京都": "kyoto",
-            "kyoto": "kyoto",
-            "神戸": "hyogo/kobe",
-            "kobe": "hyogo/kobe",
-            "兵庫": "hyogo",
-            "hyogo": "hyogo",
-            "奈良": "nara",
-            "nara": "nara",
-            # 中部
-            "名古屋": "aichi/nagoya",
-            "愛知": "aichi",
-            "静岡": "shizuoka",
-            "長野": "nagano",
-            "新潟": "niigata",
-            "金沢": "ishikawa/kanazawa",
-            "石川": "ishikawa",
-            "富山": "toyama",
-            # 東北
-            "仙台": "miyagi/sendai",
-            "宮城": "miyagi",
-            "福島": "fukushima",
-            "山形": "yamagata",
-            "青森": "aomori",
-            "秋田": "akita",
-            "盛岡": "iwate/morioka",
-            "岩手": "iwate",
-            # 中国・四国
-            "広島": "hiroshima",
-            "hiroshima": "hiroshima",
-            "岡山": "okayama",
-            "okayama": "okayama",
-            "鳥取": "tottori",
-            "tottori": "tottori",
-            "米子": "tottori",  # 米子は鳥取県
-            "yonago": "tottori",
-            "島根": "shimane",
-            "shimane": "shimane",
-            "松江": "shimane/matsue",
-            "matsue": "shimane/matsue",
-            "出雲": "shimane",
-            "izumo": "shimane",
-            "山口": "yamaguchi",
-            "yamaguchi": "yamaguchi",
-            "高松": "kagawa/takamatsu",
-            "takamatsu": "kagawa/takamatsu",
-            "香川": "kagawa",
-            "kagawa": "kagawa",
-            "松山": "ehime/matsuyama",
-            "matsuyama": "ehime/matsuyama",
-            "愛媛": "ehime",
-            "ehime": "ehime",
-            "高知": "kochi",
-            "kochi": "kochi",
-            "徳島": "tokushima",
-            "tokushima": "tokushima",
-            # 九州
-            "福岡": "fukuoka",
-            "博多": "fukuoka",
-            "北九州": "fukuoka/kitakyushu",
-            "熊本": "kumamoto",
-            "長崎": "nagasaki",
-            "大分": "oita",
-            "鹿児島": "kagoshima",
-            "宮崎": "miyazaki",
-            "佐賀": "saga",
-            # 北海道
-            "札幌": "hokkaido/sapporo",
-            "北海道": "hokkaido",
-        }
-        
         # 日本語とアルファベット両方で検索
-        dep_code = city_map.get(departure) or city_map.get(departure.lower()) or "tokyo"
-        arr_code = city_map.get(arrival) or city_map.get(arrival.lower()) or "osaka"
+        dep_code = self.CITY_MAP.get(departure) or self.CITY_MAP.get(departure.lower()) or "tokyo"
+        arr_code = self.CITY_MAP.get(arrival) or self.CITY_MAP.get(arrival.lower()) or "osaka"
         
         print(f"[BUS] URL mapping: {departure} -> {dep_code}, {arrival} -> {arr_code}")
         
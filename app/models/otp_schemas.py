@@ -1,6 +1,8 @@
 """
 OTP Schemas - Pydantic models for Phase 9 OTP Automation
 """
+import re
+
 from pydantic import BaseModel, Field
 from typing import Optional, List
 from datetime import datetime
@@ -91,31 +93,51 @@ class SMSWebhookRequest(BaseModel):
 
 # ==================== Service-specific OTP Patterns ====================
 
-# 送信元ドメインのホワイトリスト（サービス別）
+# 送信元ドメインのホワイトリスト（サービス名 → ドメインのタプル）
 OTP_SENDER_DOMAINS = {
-    "amazon": ["amazon.co.jp", "amazon.com", "amazon.jp"],
-    "ex_reservation": ["expy.jp", "jr-central.co.jp", "smartex.jp"],
-    "rakuten": ["rakuten.co.jp", "rakuten.jp"],
-    "line": ["line.me", "line.biz"],
-    "google": ["google.com", "google.co.jp"],
-    "microsoft": ["microsoft.com", "live.com", "outlook.com"],
-    "yahoo": ["yahoo.co.jp", "yahoo.com"],
-    "apple": ["apple.com", "icloud.com"],
+    "amazon": ("amazon.co.jp", "amazon.com", "amazon.jp"),
+    "ex_reservation": ("expy.jp", "jr-central.co.jp", "smartex.jp"),
+    "rakuten": ("rakuten.co.jp", "rakuten.jp"),
+    "line": ("line.me", "line.biz"),
+    "google": ("google.com", "google.co.jp"),
+    "microsoft": ("microsoft.com", "live.com", "outlook.com"),
+    "yahoo": ("yahoo.co.jp", "yahoo.com"),
+    "apple": ("apple.com", "icloud.com"),
 }
 
-# OTP抽出パターン（優先順位順）
+# OTP抽出パターン（優先順位順、桁数の上限を超える数字列の先頭だけを拾わないよう後方の数字を否定先読み）
 OTP_PATTERNS = [
     # 明示的なラベル付きパターン
-    r'(?:認証コード|確認コード|ワンタイムパスワード|OTP|verification code|passcode|セキュリティコード)[：:\s]*[「\[]?(\d{4,8})[」\]]?',
-    r'(?:コード|code)[：:\s]*[「\[]?(\d{4,8})[」\]]?',
+    r'(?:認証コード|確認コード|ワンタイムパスワード|OTP|verification code|passcode|セキュリティコード)[：:\s]*[「\[]?(\d{4,8})(?!\d)[」\]]?',
+    r'(?:コード|code)[：:\s]*[「\[]?(\d{4,8})(?!\d)[」\]]?',
     # 「コードは」パターン
-    r'(?:コードは|code is)[：:\s]*[「\[]?(\d{4,8})[」\]]?',
+    r'(?:コードは|code is)[：:\s]*[「\[]?(\d{4,8})(?!\d)[」\]]?',
     # 独立した6桁の数字（最も一般的）
     r'(?<!\d)(\d{6})(?!\d)',
 ]
 
-# OTP入力フィールドの検知セレクタ（Playwright用）
-OTP_FIELD_SELECTORS = [
+
+def _has_ascii_letters(pattern: str) -> bool:
+    """エスケープ（\\d, \\s等）を除いたパターンに英字リテラルが含まれるか"""
+    return re.search(r'[A-Za-z]', re.sub(r'\\.', '', pattern)) is not None
+
+
+# コンパイル済みOTP抽出パターン（OTP_PATTERNSと同じ順序、英字を含むパターンのみ大文字小文字を区別しない）
+OTP_PATTERNS_COMPILED = tuple(
+    re.compile(p, re.IGNORECASE) if _has_ascii_letters(p) else re.compile(p)
+    for p in OTP_PATTERNS
+)
+
+# 全パターンの結合（一度の走査で一致の有無を判定、グループiはOTP_PATTERNS[i-1]に対応）
+OTP_PATTERN_UNION = re.compile("|".join(
+    f"(?i:{p})" if _has_ascii_letters(p) else f"(?:{p})" for p in OTP_PATTERNS
+))
+
+# どのOTPパターンも4桁以上の数字列を含むため、これに一致しないテキストは全パターンの走査を省ける
+OTP_DIGIT_RUN = re.compile(r'\d\d\d\d')
+
+# OTP入力フィールドの検知セレクタ（Playwright用、優先順位順）
+OTP_FIELD_SELECTORS = (
     'input[name*="otp"]',
     'input[name*="code"]',
     'input[name*="verification"]',
@@ -129,10 +151,10 @@ OTP_FIELD_SELECTORS = [
     '#verificationCode',
     '#authCode',
     '#mfaCode',
-]
+)
 
 # OTP入力画面の検知テキスト
-OTP_PAGE_INDICATORS = [
+OTP_PAGE_INDICATORS = (
     "認証コード",
     "確認コード",
     "ワンタイムパスワード",
@@ -144,7 +166,10 @@ OTP_PAGE_INDICATORS = [
     "2要素認証",
     "SMS認証",
     "メール認証",
-]
+)
+
+# OTP入力画面の検知テキストの結合パターン（ページ本文を一度の走査で判定）
+OTP_PAGE_INDICATOR_RE = re.compile("|".join(map(re.escape, OTP_PAGE_INDICATORS)))
 
 
 
@@ -30,6 +30,13 @@ from app.models.content_schemas import (
 
 logger = logging.getLogger(__name__)
 
+# HTMLパーサー: lxml（C実装）があれば優先し、なければ標準のhtml.parserを使用
+try:
+    import lxml  # noqa: F401
+    HTML_PARSER = "lxml"
+except ImportError:
+    HTML_PARSER = "html.parser"
+
 
 class PDFExtractor:
     """6A: PDF解析 - PDFからテキスト抽出"""
@@ -320,7 +327,7 @@ class URLExtractor:
             response = requests.get(url, headers=headers, timeout=timeout_ms / 1000, allow_redirects=True)
             response.raise_for_status()
             
-            soup = BeautifulSoup(response.text, 'html.parser')
+            soup = BeautifulSoup(response.text, HTML_PARSER)
             raw_html = response.text
             
             # SPA（JavaScript必須ページ）の検出
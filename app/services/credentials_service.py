@@ -19,6 +19,11 @@ class CredentialsService:
         """サービスを初期化"""
         self.encryption = get_encryption_service()
     
+    @classmethod
+    def reset(cls) -> None:
+        """メモリストレージをクリア（テスト間の分離用）"""
+        cls._credentials_store.clear()
+    
     def _get_key(self, user_id: str, service: str) -> str:
         """ストレージキーを生成"""
         return f"{user_id}:{service}"
@@ -2,6 +2,7 @@
 Dynamic Auth Service for Phase 3B/3C: Execution Engine
 動的認証/新規登録サービス - 汎用的な認証フロー対応
 """
+import itertools
 import secrets
 import string
 import re
@@ -19,6 +20,26 @@ from app.models.schemas import (
 from app.services.credentials_service import get_credentials_service
 
 
+PASSWORD_SPECIAL_CHARS = "!@#$%^&*"
+
+# パスワード要件キー、未指定時のデフォルト、対応する文字種
+_PASSWORD_CHAR_CLASSES = (
+    ("require_lowercase", True, string.ascii_lowercase),
+    ("require_uppercase", True, string.ascii_uppercase),
+    ("require_digits", True, string.digits),
+    ("require_special", False, PASSWORD_SPECIAL_CHARS),
+)
+
+# 要件フラグの組み合わせ → (全体の文字プール, 必須文字種ごとのプール) を事前計算
+_PASSWORD_CHARSETS = {
+    flags: (
+        "".join(chars for flag, (_, _, chars) in zip(flags, _PASSWORD_CHAR_CLASSES) if flag),
+        tuple(chars for flag, (_, _, chars) in zip(flags, _PASSWORD_CHAR_CLASSES) if flag),
+    )
+    for flags in itertools.product((True, False), repeat=len(_PASSWORD_CHAR_CLASSES))
+}
+
+
 class DynamicAuthService:
     """動的認証/新規登録サービス"""
     
@@ -53,26 +74,12 @@ class DynamicAuthService:
         """
         req = requirements or self.DEFAULT_PASSWORD_REQUIREMENTS
         
-        # 要件を満たす文字セットを構築
-        chars = ""
-        required_chars = []
-        
-        if req.get("require_lowercase", True):
-            chars += string.ascii_lowercase
-            required_chars.append(secrets.choice(string.ascii_lowercase))
-        
-        if req.get("require_uppercase", True):
-            chars += string.ascii_uppercase
-            required_chars.append(secrets.choice(string.ascii_uppercase))
-        
-        if req.get("require_digits", True):
-            chars += string.digits
-            required_chars.append(secrets.choice(string.digits))
-        
-        if req.get("require_special", False):
-            special = "!@#$%^&*"
-            chars += special
-            required_chars.append(secrets.choice(special))
+        # 要件を満たす文字セットを取得（各文字種から最低1文字を含める）
+        flags = tuple(
+            bool(req.get(key, default)) for key, default, _ in _PASSWORD_CHAR_CLASSES
+        )
+        chars, required_pools = _PASSWORD_CHARSETS[flags]
+        required_chars = [secrets.choice(pool) for pool in required_pools]
         
         # 残りの文字をランダムに生成
         remaining_length = max(length - len(required_chars), 0)
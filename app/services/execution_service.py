@@ -31,6 +31,12 @@ class ExecutionService:
         self.credentials_service = get_credentials_service()
         self.dynamic_auth_service = get_dynamic_auth_service()
     
+    @classmethod
+    def reset(cls) -> None:
+        """メモリストレージをクリア（テスト間の分離用）"""
+        cls._execution_state.clear()
+        cls._execution_logs.clear()
+    
     def _get_auth_options(self, service: str) -> AuthOptions:
         """
         サービスに応じた認証オプションを取得
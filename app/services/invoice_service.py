@@ -1,12 +1,16 @@
 """
 Invoice Management Service - Phase 7A/7B: 請求書情報抽出・スケジュール計算
 """
+import asyncio
 import logging
 import hashlib
 import json
 import re
-from typing import Optional, Dict, Any
-from datetime import datetime, timedelta
+import time
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Optional, Dict, Any, List
+from datetime import date, datetime, timedelta
 from zoneinfo import ZoneInfo
 
 from app.config import settings
@@ -18,6 +22,110 @@ from app.models.invoice_schemas import (
 
 logger = logging.getLogger(__name__)
 
+# 日本標準時（モジュール全体で共有）
+JST = ZoneInfo("Asia/Tokyo")
+
+# 祝日判定: jpholidayがない場合は土日のみ考慮
+try:
+    import jpholiday
+except ImportError:
+    jpholiday = None
+
+# JSONデコーダー: orjson（C実装）があれば優先し、なければ標準のjsonを使用
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:
+    _json_loads = json.loads
+
+# 請求書で使われる日付フォーマット（ISO 8601で解釈できない場合に順に試行）
+_DATE_FORMATS = ("%Y-%m-%d", "%Y/%m/%d", "%Y年%m月%d日")
+
+# スラッシュ区切り・年月日形式の日付（strptimeより先に照合する）
+_SLASH_DATE_RE = re.compile(r"^(\d{4})/(\d{1,2})/(\d{1,2})$")
+_JP_DATE_RE = re.compile(r"^(\d{4})年(\d{1,2})月(\d{1,2})日$")
+
+# 抽出値がこの型に一致する場合はmodel_constructで検証を省略する
+_NONE = type(None)
+_CONSTRUCT_FIELD_TYPES = {
+    "amount": (int, _NONE),
+    "currency": (str,),
+    "invoice_number": (str, _NONE),
+    "invoice_month": (str, _NONE),
+    "issuer_name": (str, _NONE),
+    "issuer_address": (str, _NONE),
+    "confidence_score": (float, _NONE),
+}
+
+# 金額文字列の正規化テーブル（全角数字→半角、桁区切り・通貨記号・「円」・空白を除去）
+_AMOUNT_TABLE = str.maketrans("０１２３４５６７８９", "0123456789", ",，¥￥円 \t\r\n\u3000")
+
+# 曜日ごとの前営業日へのシフト日数（月=0 … 土=-1, 日=-2）
+_WEEKEND_SHIFT = (0, 0, 0, 0, 0, -1, -2)
+
+# 各月の末日（平年）
+_MONTH_LAST_DAY = (31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31)
+
+
+def _last_day_of_month(year: int, month: int) -> int:
+    """月末日を取得（うるう年の2月は29日）"""
+    if month == 2 and year % 4 == 0 and (year % 100 != 0 or year % 400 == 0):
+        return 29
+    return _MONTH_LAST_DAY[month - 1]
+
+
+@lru_cache(maxsize=4096)
+def _is_business_day(ordinal: int) -> bool:
+    """営業日か判定（土日・祝日以外、祝日はjpholidayがインストールされている場合のみ考慮）"""
+    day = date.fromordinal(ordinal)
+    if day.weekday() >= 5:  # 5=土曜, 6=日曜
+        return False
+    return jpholiday is None or not jpholiday.is_holiday(day)
+
+
+def _fast_parse_date(value: str) -> Optional[datetime]:
+    """
+    日付文字列をパース
+    
+    YYYY-MM-DD・YYYY/MM/DDは文字列スライス、それ以外のスラッシュ区切り・
+    YYYY年MM月DD日はコンパイル済み正規表現で直接組み立て、残りはISO 8601 →
+    _DATE_FORMATSの順に試行する。いずれにも一致しない場合はNone。
+    """
+    if len(value) == 10 and value[4] == value[7] and value[4] in "-/":
+        try:
+            return datetime(int(value[:4]), int(value[5:7]), int(value[8:10]))
+        except ValueError:
+            pass
+    match = _SLASH_DATE_RE.match(value) or _JP_DATE_RE.match(value)
+    if match:
+        try:
+            return datetime(int(match[1]), int(match[2]), int(match[3]))
+        except ValueError:
+            return None
+    try:
+        return datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        pass
+    for fmt in _DATE_FORMATS:
+        try:
+            return datetime.strptime(value, fmt)
+        except ValueError:
+            continue
+    return None
+
+
+@lru_cache(maxsize=1)
+def _get_llm():
+    """請求書抽出用のLLMクライアントを取得（初回のみ生成し、以降は使い回す）"""
+    from langchain_anthropic import ChatAnthropic
+    
+    return ChatAnthropic(
+        model="claude-sonnet-4-20250514",
+        api_key=settings.ANTHROPIC_API_KEY,
+        temperature=0,
+        max_tokens=1024,
+    )
+
 
 class InvoiceExtractor:
     """7A: 請求書情報抽出 - Phase 6の分類結果から詳細情報を抽出"""
@@ -56,6 +164,15 @@ class InvoiceExtractor:
 - bank_infoは振込先情報がある場合のみ設定してください
 
 JSONのみを出力してください。"""
+    
+    # 抽出結果キャッシュ（テキストのハッシュ → 結果、同一テンプレートの請求書でLLM呼び出しを省略）
+    EXTRACT_CACHE_SIZE = 1024
+    _extract_cache: "OrderedDict[bytes, InvoiceExtractionResult]" = OrderedDict()
+    
+    @classmethod
+    def reset(cls) -> None:
+        """抽出結果キャッシュをクリア（テスト間の分離用）"""
+        cls._extract_cache.clear()
 
     @staticmethod
     async def extract_from_text(
@@ -73,40 +190,39 @@ JSONのみを出力してください。"""
             InvoiceExtractionResult
         """
         try:
-            from langchain_anthropic import ChatAnthropic
-            
             # Phase 6で既に抽出されたデータがある場合は活用
             if existing_data:
                 result = InvoiceExtractor._parse_existing_data(existing_data)
                 if result.success and result.amount and result.due_date:
                     return result
             
-            # AIで抽出
-            prompt = InvoiceExtractor.EXTRACTION_PROMPT.format(
-                text=text[:15000]  # 最大15KB
-            )
+            text = text[:15000]  # 最大15KB
+            cache = InvoiceExtractor._extract_cache
+            key = InvoiceExtractor._cache_key(text)
+            cached = cache.get(key)
+            if cached is not None:
+                cache.move_to_end(key)
+                return cached
             
-            llm = ChatAnthropic(
-                model="claude-sonnet-4-20250514",
-                api_key=settings.ANTHROPIC_API_KEY,
-                temperature=0,
-                max_tokens=1024,
-            )
+            # AIで抽出
+            prompt = InvoiceExtractor.EXTRACTION_PROMPT.format(text=text)
             
-            response = await llm.ainvoke(prompt)
+            response = await _get_llm().ainvoke(prompt)
             response_text = response.content
             
-            # JSONを抽出
-            json_match = re.search(r'```(?:json)?\s*(\{.*?\})\s*```', response_text, re.DOTALL)
-            if json_match:
-                json_str = json_match.group(1)
-            else:
-                json_match = re.search(r'\{.*\}', response_text, re.DOTALL)
-                json_str = json_match.group(0) if json_match else response_text
+            # JSONを抽出（コードフェンスの有無にかかわらず最初の{から最後の}まで）
+            start = response_text.find("{")
+            end = response_text.rfind("}") + 1
+            json_str = response_text[start:end] if start != -1 and end > start else response_text
             
-            data = json.loads(json_str)
+            data = _json_loads(json_str)
             
-            return InvoiceExtractor._build_result(data)
+            result = InvoiceExtractor._build_result(data)
+            if result.success:
+                cache[key] = result
+                if len(cache) > InvoiceExtractor.EXTRACT_CACHE_SIZE:
+                    cache.popitem(last=False)
+            return result
             
         except Exception as e:
             logger.error(f"Invoice extraction failed: {e}")
@@ -115,45 +231,66 @@ JSONのみを出力してください。"""
                 error=str(e)
             )
     
+    @staticmethod
+    async def extract_from_texts(
+        texts: List[str],
+        concurrency: int = 8,
+    ) -> List[InvoiceExtractionResult]:
+        """
+        複数テキストから請求書情報をまとめて抽出
+        
+        キャッシュ済みのテキストはLLMを呼び出さずに返し、残りは同時実行数を
+        制限して並行に抽出する（同一テキストの重複呼び出しはしない）。
+        
+        Args:
+            texts: 請求書のテキストコンテンツのリスト
+            concurrency: LLMの最大同時呼び出し数
+        
+        Returns:
+            textsと同じ順序のInvoiceExtractionResultのリスト
+        """
+        results: List[Optional[InvoiceExtractionResult]] = [None] * len(texts)
+        pending: Dict[bytes, List[int]] = {}
+        for i, text in enumerate(texts):
+            key = InvoiceExtractor._cache_key(text[:15000])
+            cached = InvoiceExtractor._extract_cache.get(key)
+            if cached is not None:
+                results[i] = cached
+            else:
+                pending.setdefault(key, []).append(i)
+        
+        semaphore = asyncio.Semaphore(concurrency)
+        
+        async def extract(indices: List[int]) -> None:
+            async with semaphore:
+                result = await InvoiceExtractor.extract_from_text(texts[indices[0]])
+            for i in indices:
+                results[i] = result
+        
+        await asyncio.gather(*(extract(indices) for indices in pending.values()))
+        return results
+    
+    @staticmethod
+    def _cache_key(text: str) -> bytes:
+        """抽出結果キャッシュのキー（テキストのblake2bダイジェスト）"""
+        return hashlib.blake2b(text.encode(), digest_size=16).digest()
+    
     @staticmethod
     def _parse_existing_data(data: Dict[str, Any]) -> InvoiceExtractionResult:
         """Phase 6で抽出されたデータをパース"""
         try:
             amount = data.get("amount")
             if isinstance(amount, str):
-                amount = int(re.sub(r'[,\s]', '', amount))
+                amount = int(amount.translate(_AMOUNT_TABLE))
             
-            due_date = None
             due_date_str = data.get("due_date")
-            if due_date_str:
-                try:
-                    due_date = datetime.fromisoformat(due_date_str.replace("Z", "+00:00"))
-                except ValueError:
-                    # 日付形式を解析
-                    for fmt in ["%Y-%m-%d", "%Y/%m/%d", "%Y年%m月%d日"]:
-                        try:
-                            due_date = datetime.strptime(due_date_str, fmt)
-                            break
-                        except ValueError:
-                            continue
+            due_date = _fast_parse_date(due_date_str) if due_date_str else None
             
             bank_info = None
             if data.get("bank_info"):
-                bank_info = BankInfo(**data["bank_info"])
+                bank_info = InvoiceExtractor._make_bank_info(data["bank_info"])
             
-            return InvoiceExtractionResult(
-                success=True,
-                amount=amount,
-                currency=data.get("currency", "JPY"),
-                due_date=due_date,
-                invoice_number=data.get("invoice_number"),
-                invoice_month=data.get("invoice_month"),
-                issuer_name=data.get("issuer_name"),
-                issuer_address=data.get("issuer_address"),
-                bank_info=bank_info,
-                raw_extracted_data=data,
-                confidence_score=data.get("confidence_score", 0.8),
-            )
+            return InvoiceExtractor._make_result(data, amount, due_date, bank_info)
         except Exception as e:
             logger.error(f"Failed to parse existing data: {e}")
             return InvoiceExtractionResult(
@@ -167,20 +304,10 @@ JSONのみを出力してください。"""
         try:
             amount = data.get("amount")
             if isinstance(amount, str):
-                amount = int(re.sub(r'[,\s]', '', amount))
+                amount = int(amount.translate(_AMOUNT_TABLE))
             
-            due_date = None
             due_date_str = data.get("due_date")
-            if due_date_str:
-                try:
-                    due_date = datetime.fromisoformat(due_date_str)
-                except ValueError:
-                    for fmt in ["%Y-%m-%d", "%Y/%m/%d", "%Y年%m月%d日"]:
-                        try:
-                            due_date = datetime.strptime(due_date_str, fmt)
-                            break
-                        except ValueError:
-                            continue
+            due_date = _fast_parse_date(due_date_str) if due_date_str else None
             
             bank_info = None
             bank_data = data.get("bank_info")
@@ -188,27 +315,57 @@ JSONのみを出力してください。"""
                 # nullでない値のみを含める
                 filtered_bank = {k: v for k, v in bank_data.items() if v is not None}
                 if filtered_bank.get("bank_name"):
-                    bank_info = BankInfo(**filtered_bank)
+                    bank_info = InvoiceExtractor._make_bank_info(filtered_bank)
             
-            return InvoiceExtractionResult(
-                success=True,
-                amount=amount,
-                currency=data.get("currency", "JPY"),
-                due_date=due_date,
-                invoice_number=data.get("invoice_number"),
-                invoice_month=data.get("invoice_month"),
-                issuer_name=data.get("issuer_name"),
-                issuer_address=data.get("issuer_address"),
-                bank_info=bank_info,
-                raw_extracted_data=data,
-                confidence_score=data.get("confidence_score", 0.8),
-            )
+            return InvoiceExtractor._make_result(data, amount, due_date, bank_info)
         except Exception as e:
             logger.error(f"Failed to build result: {e}")
             return InvoiceExtractionResult(
                 success=False,
                 error=str(e)
             )
+    
+    @staticmethod
+    def _make_bank_info(bank_data: Dict[str, Any]) -> BankInfo:
+        """BankInfoを構築（全フィールドが文字列なら検証を省略）"""
+        if (
+            isinstance(bank_data.get("bank_name"), str)
+            and bank_data.keys() <= BankInfo.model_fields.keys()
+            and all(isinstance(v, str) for v in bank_data.values())
+        ):
+            return BankInfo.model_construct(**bank_data)
+        return BankInfo(**bank_data)
+    
+    @staticmethod
+    def _make_result(
+        data: Dict[str, Any],
+        amount: Any,
+        due_date: Optional[datetime],
+        bank_info: Optional[BankInfo],
+    ) -> InvoiceExtractionResult:
+        """成功時のInvoiceExtractionResultを構築"""
+        fields = {
+            "amount": amount,
+            "currency": data.get("currency", "JPY"),
+            "invoice_number": data.get("invoice_number"),
+            "invoice_month": data.get("invoice_month"),
+            "issuer_name": data.get("issuer_name"),
+            "issuer_address": data.get("issuer_address"),
+            "confidence_score": data.get("confidence_score", 0.8),
+        }
+        # 型が既に一致していれば検証を省略、そうでなければ通常の検証で変換・エラー検出
+        build = (
+            InvoiceExtractionResult.model_construct
+            if all(isinstance(v, _CONSTRUCT_FIELD_TYPES[k]) for k, v in fields.items())
+            else InvoiceExtractionResult
+        )
+        return build(
+            success=True,
+            due_date=due_date,
+            bank_info=bank_info,
+            raw_extracted_data=data,
+            **fields,
+        )
 
 
 class ScheduleCalculator:
@@ -216,7 +373,7 @@ class ScheduleCalculator:
     
     # デフォルト支払い時刻（JST 18:00）
     DEFAULT_PAYMENT_HOUR = 18
-    JST = ZoneInfo("Asia/Tokyo")
+    JST = JST  # 後方互換のためクラス属性としても公開
     
     @staticmethod
     def calculate_payment_schedule(
@@ -241,7 +398,7 @@ class ScheduleCalculator:
         """
         # タイムゾーンを確認・設定
         if due_date.tzinfo is None:
-            due_date = due_date.replace(tzinfo=ScheduleCalculator.JST)
+            due_date = due_date.replace(tzinfo=JST)
         
         # 期日の前日18:00を計算
         payment_date = due_date - timedelta(days=1)
@@ -258,7 +415,7 @@ class ScheduleCalculator:
             payment_time, is_holiday_adjusted = ScheduleCalculator._adjust_for_holidays(payment_time)
         
         # 支払いまでの日数を計算
-        now = datetime.now(ScheduleCalculator.JST)
+        now = datetime.now(JST)
         days_until = (payment_time.date() - now.date()).days
         
         return ScheduleCalculationResponse(
@@ -285,30 +442,17 @@ class ScheduleCalculator:
         """
         # YYYY-MM形式をパース
         year, month = map(int, invoice_month.split("-"))
+        if not 1 <= month <= 12:
+            raise ValueError(f"Invalid invoice_month: {invoice_month}")
         
-        # 翌月を計算
-        if month == 12:
-            next_year = year + 1
-            next_month = 1
-        else:
-            next_year = year
-            next_month = month + 1
+        # 翌月を計算（12月 → 翌年1月）
+        next_year = year + month // 12
+        next_month = month % 12 + 1
         
         # 翌月末日を計算
-        if next_month == 12:
-            last_day = 31
-        elif next_month in [4, 6, 9, 11]:
-            last_day = 30
-        elif next_month == 2:
-            # うるう年判定
-            if (next_year % 4 == 0 and next_year % 100 != 0) or (next_year % 400 == 0):
-                last_day = 29
-            else:
-                last_day = 28
-        else:
-            last_day = 31
+        last_day = _last_day_of_month(next_year, next_month)
         
-        due_date = datetime(next_year, next_month, last_day, tzinfo=ScheduleCalculator.JST)
+        due_date = datetime(next_year, next_month, last_day, tzinfo=JST)
         
         return ScheduleCalculator.calculate_payment_schedule(
             due_date=due_date,
@@ -327,63 +471,50 @@ class ScheduleCalculator:
         Returns:
             (調整後の日時, 調整されたかどうか)
         """
-        adjusted = False
+        # 土日なら直前の金曜日へ寄せ、そこから祝日・土日を前営業日まで遡る
+        start = payment_time.toordinal()
+        ordinal = start + _WEEKEND_SHIFT[payment_time.weekday()]
+        while not _is_business_day(ordinal):
+            ordinal -= 1
         
-        # 土日チェック
-        while payment_time.weekday() >= 5:  # 5=土曜, 6=日曜
-            payment_time = payment_time - timedelta(days=1)
-            adjusted = True
-        
-        # 祝日チェック（jpholidayがインストールされている場合）
-        try:
-            import jpholiday
-            while jpholiday.is_holiday(payment_time.date()):
-                payment_time = payment_time - timedelta(days=1)
-                adjusted = True
-                # 土日に戻った場合は再度チェック
-                while payment_time.weekday() >= 5:
-                    payment_time = payment_time - timedelta(days=1)
-        except ImportError:
-            # jpholidayがない場合は土日のみ考慮
-            pass
+        adjusted = ordinal != start
+        if adjusted:
+            payment_time = payment_time - timedelta(days=start - ordinal)
         
         return payment_time, adjusted
     
     @staticmethod
-    def is_payment_due(scheduled_time: datetime) -> bool:
+    def is_payment_due(scheduled_time: datetime, now: Optional[datetime] = None) -> bool:
         """
         支払い時刻が到来しているかチェック
         
         Args:
             scheduled_time: スケジュールされた支払い日時
+            now: 基準時刻（省略時は現在時刻。複数件をまとめて判定する場合は一度取得して渡す）
         
         Returns:
             True if 支払い時刻が到来している
         """
-        now = datetime.now(ScheduleCalculator.JST)
         if scheduled_time.tzinfo is None:
-            scheduled_time = scheduled_time.replace(tzinfo=ScheduleCalculator.JST)
+            scheduled_time = scheduled_time.replace(tzinfo=JST)
+        if now is None:
+            # 現在時刻はdatetimeを生成せずPOSIXタイムスタンプで比較
+            return scheduled_time.timestamp() <= time.time()
         return now >= scheduled_time
 
 
-# シングルトンインスタンス
-_invoice_extractor: Optional[InvoiceExtractor] = None
-_schedule_calculator: Optional[ScheduleCalculator] = None
+# シングルトンインスタンス（状態を持たず生成コストもないためインポート時に生成）
+_invoice_extractor = InvoiceExtractor()
+_schedule_calculator = ScheduleCalculator()
 
 
 def get_invoice_extractor() -> InvoiceExtractor:
     """InvoiceExtractorのインスタンスを取得"""
-    global _invoice_extractor
-    if _invoice_extractor is None:
-        _invoice_extractor = InvoiceExtractor()
     return _invoice_extractor
 
 
 def get_schedule_calculator() -> ScheduleCalculator:
     """ScheduleCalculatorのインスタンスを取得"""
-    global _schedule_calculator
-    if _schedule_calculator is None:
-        _schedule_calculator = ScheduleCalculator()
     return _schedule_calculator
 
 
@@ -585,7 +716,7 @@ class InvoiceService:
             raise ValueError(f"Cannot approve invoice with status: {invoice['status']}")
         
         # 更新データを構築
-        now = datetime.now(ZoneInfo("Asia/Tokyo"))
+        now = datetime.now(JST)
         updates = {
             "status": "approved",
             "approved_at": now.isoformat(),
@@ -634,7 +765,7 @@ class InvoiceService:
             raise ValueError(f"Cannot reject invoice with status: {invoice['status']}")
         
         # 更新データを構築
-        now = datetime.now(ZoneInfo("Asia/Tokyo"))
+        now = datetime.now(JST)
         updates = {
             "status": "rejected",
             "updated_at": now.isoformat(),
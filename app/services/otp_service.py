@@ -2,7 +2,6 @@
 OTP Service - Phase 9: OTP Automation
 メール・SMSからOTPを抽出・管理するサービス
 """
-import re
 import asyncio
 import logging
 from typing import Optional, List, Tuple
@@ -13,7 +12,9 @@ from app.services.supabase_client import get_supabase_client
 from app.models.otp_schemas import (
     OTPSource,
     OTPResult,
-    OTP_PATTERNS,
+    OTP_PATTERNS_COMPILED,
+    OTP_DIGIT_RUN,
+    OTP_PATTERN_UNION,
     OTP_SENDER_DOMAINS,
 )
 
@@ -49,8 +50,22 @@ class OTPService:
         if not text:
             return None
         
-        for pattern in OTP_PATTERNS:
-            match = re.search(pattern, text, re.IGNORECASE)
+        # 4桁以上の数字列がなければOTPは含まれない（OTPを含まない長い文字起こしを安価に除外）
+        if OTP_DIGIT_RUN.search(text) is None:
+            return None
+        
+        # 結合パターンで一度だけ走査し、どのパターンにも一致しなければ終了
+        union_match = OTP_PATTERN_UNION.search(text)
+        if union_match is None:
+            return None
+        
+        # 最優先パターンが最左で一致した場合はそのまま採用、それ以外は優先順位順に検索
+        if union_match.group(1) is not None:
+            matches = (union_match,)
+        else:
+            matches = (pattern.search(text) for pattern in OTP_PATTERNS_COMPILED)
+        
+        for match in matches:
             if match:
                 otp = match.group(1)
                 # 4〜8桁の数字であることを確認
@@ -74,7 +89,7 @@ class OTPService:
         if not service or not sender:
             return True  # フィルタなしの場合は常にTrue
         
-        domains = OTP_SENDER_DOMAINS.get(service.lower(), [])
+        domains = OTP_SENDER_DOMAINS.get(service.lower(), ())
         if not domains:
             return True  # ドメイン定義がない場合は許可
         
@@ -1,25 +1,95 @@
 """
 Pytest configuration and fixtures
 """
+from functools import lru_cache
+from unittest.mock import MagicMock
+
+import httpx
 import pytest
 from fastapi.testclient import TestClient
 
-from main import app
+from app.services.credentials_service import CredentialsService
+from app.services.execution_service import ExecutionService
+from app.services.invoice_service import InvoiceExtractor
+
+try:
+    import orjson
+except ImportError:  # orjsonが無い環境では標準のjsonでデコード
+    orjson = None
+
+
+# ==================== Response Decoding ====================
+
+if orjson is not None:
+    _httpx_response_json = httpx.Response.json
+
+    def _orjson_response_json(self, **kwargs):
+        """TestClientのresponse.json()をorjsonでデコード（kwargs指定時は標準実装）"""
+        if kwargs:
+            return _httpx_response_json(self, **kwargs)
+        return orjson.loads(self.content)
+
+    httpx.Response.json = _orjson_response_json
+
+
+# ==================== Markers ====================
+
+# FastAPIアプリを起動するフィクスチャ（これらを使うテストにはroutesマーカーを自動で付与）
+_APP_FIXTURES = frozenset({"client", "session_client", "fastapi_app"})
+
+
+def pytest_collection_modifyitems(config, items):
+    """HTTPルートのテストにroutesマーカーを付与（-m "not routes" でアプリ起動なしの高速実行）"""
+    routes = pytest.mark.routes
+    for item in items:
+        if _APP_FIXTURES.intersection(getattr(item, "fixturenames", ())):
+            item.add_marker(routes)
+
+
+# ==================== App / Client ====================
+
+@lru_cache(maxsize=1)
+def _app():
+    """FastAPIアプリを初回利用時に1回だけ読み込む（mainは全ルーターを読み込むため、収集時には読み込まない）"""
+    from main import app
+    return app
+
+
+@pytest.fixture(scope="session")
+def fastapi_app():
+    """テスト対象のFastAPIアプリ"""
+    return _app()
+
+
+@pytest.fixture(scope="session")
+def session_client():
+    """セッション全体で共有するHTTPクライアント（アプリの起動・終了は1回のみ）"""
+    with TestClient(_app()) as test_client:
+        yield test_client
 
 
 @pytest.fixture
-def client():
-    """テスト用のHTTPクライアント"""
-    return TestClient(app)
+def client(session_client):
+    """テスト用のHTTPクライアント（前のテストの認証Cookieを持ち越さない）"""
+    session_client.cookies.clear()
+    return session_client
+
+
+@pytest.fixture(autouse=True)
+def reset_in_memory_stores():
+    """メモリストレージ版サービスの状態をテストごとにクリア（イベントループはセッション共有）"""
+    yield
+    CredentialsService.reset()
+    ExecutionService.reset()
+    InvoiceExtractor.reset()
 
 
 # ==================== Chat Fixtures ====================
 
-@pytest.fixture
-def auth_token(client):
-    """認証済みユーザーのトークン"""
+def _register_and_login(client, prefix: str, display_name: str) -> str:
+    """ユニークなユーザーを登録してログインし、アクセストークンを返す"""
     import uuid
-    unique_email = f"test_{uuid.uuid4().hex[:8]}@example.com"
+    unique_email = f"{prefix}_{uuid.uuid4().hex[:8]}@example.com"
     
     # Register
     client.post(
@@ -27,7 +97,7 @@ def auth_token(client):
         json={
             "email": unique_email,
             "password": "password123",
-            "display_name": "Test User"
+            "display_name": display_name
         }
     )
     
@@ -42,31 +112,22 @@ def auth_token(client):
     return response.json()["access_token"]
 
 
+@pytest.fixture
+def auth_token(client):
+    """認証済みユーザーのトークン"""
+    return _register_and_login(client, "test", "Test User")
+
+
+@pytest.fixture(scope="session")
+def session_auth_token(session_client):
+    """セッション全体で共有する認証済みユーザーのトークン（ユーザー状態に依存しないテスト用）"""
+    return _register_and_login(session_client, "session", "Session User")
+
+
 @pytest.fixture
 def friend_token(client):
     """友達ユーザーのトークン"""
-    import uuid
-    unique_email = f"friend_{uuid.uuid4().hex[:8]}@example.com"
-    
-    # Register
-    client.post(
-        "/api/v1/chat/register",
-        json={
-            "email": unique_email,
-            "password": "password123",
-            "display_name": "Friend User"
-        }
-    )
-    
-    # Login
-    response = client.post(
-        "/api/v1/chat/login",
-        json={
-            "email": unique_email,
-            "password": "password123"
-        }
-    )
-    return response.json()["access_token"]
+    return _register_and_login(client, "friend", "Friend User")
 
 
 @pytest.fixture
@@ -152,3 +213,31 @@ def another_friend_id(client, auth_token):
     
     # Return another_user's ID
     return another_user_id
+
+
+# ==================== Supabase Mock ====================
+
+# 自分自身を返すSupabaseクエリチェーンのメソッド
+_SUPABASE_CHAIN_METHODS = (
+    "table", "select", "insert", "update", "delete",
+    "eq", "gt", "gte", "lt", "order", "limit", "offset",
+)
+
+
+@pytest.fixture
+def supabase_chain():
+    """Supabaseモックを組み立てるファクトリ（テストごとに新しいモックを作り、設定を次のテストへ持ち越さない）"""
+    def make(data=None, count=0):
+        mock = MagicMock()
+        for name in _SUPABASE_CHAIN_METHODS:
+            getattr(mock, name).return_value = mock
+        mock.execute.return_value = MagicMock(data=[] if data is None else data, count=count)
+        return mock
+    
+    return make
+
+
+@pytest.fixture
+def mock_supabase(supabase_chain):
+    """Supabaseモック（execute()は既定で空の結果を返す）"""
+    return supabase_chain()
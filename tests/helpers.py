@@ -0,0 +1,26 @@
+"""
+テスト共通ヘルパー
+"""
+import itertools
+import uuid
+from datetime import datetime, timedelta
+
+# テスト用請求書の支払期限（日付の値自体は検証しないため1回だけ計算）
+FUTURE_DUE = (datetime.now() + timedelta(days=30)).strftime("%Y-%m-%d")
+
+# 請求書名のサフィックス（実行ごとの接頭辞＋連番。DBに残る過去の実行分とも重複しない）
+_RUN_PREFIX = uuid.uuid4().hex[:4]
+_suffix_counter = itertools.count()
+
+
+def next_invoice_suffix() -> str:
+    """作成する請求書ごとに一意なサフィックスを返す"""
+    return f"{_RUN_PREFIX}{next(_suffix_counter):02x}"
+
+# テスト用の一意なID生成（乱数不要のため単調増加カウンタを使用）
+_tid_counter = itertools.count()
+
+
+def tid(prefix: str) -> str:
+    """プレフィックス付きの一意なテストIDを生成"""
+    return f"{prefix}-{next(_tid_counter)}"
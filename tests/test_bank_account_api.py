@@ -4,13 +4,12 @@ Tests for Phase 8B: Bank Account Management API
 import pytest
 import pytest_asyncio
 from httpx import AsyncClient, ASGITransport
-from main import app
 
 
 @pytest_asyncio.fixture
-async def async_client():
+async def async_client(fastapi_app):
     """非同期HTTPクライアントを作成"""
-    transport = ASGITransport(app=app)
+    transport = ASGITransport(app=fastapi_app)
     async with AsyncClient(transport=transport, base_url="http://test") as client:
         yield client
 
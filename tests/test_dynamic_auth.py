@@ -13,6 +13,41 @@ from app.models.schemas import (
 )
 
 
+# 文字種ごとのビット: 小文字=0b0001, 大文字=0b0010, 数字=0b0100, 特殊文字=0b1000
+_CHAR_CLASS_PATTERNS = (
+    re.compile(r"[a-z]"),
+    re.compile(r"[A-Z]"),
+    re.compile(r"[0-9]"),
+    re.compile(r"[!@#$%^&*]"),
+)
+
+
+def _char_classes(password: str) -> int:
+    """パスワードに含まれる文字種をビットマスクで返す"""
+    mask = 0
+    for bit, pattern in enumerate(_CHAR_CLASS_PATTERNS):
+        if pattern.search(password):
+            mask |= 1 << bit
+    return mask
+
+
+# 登録フォームのフィールド定義（モジュール読み込み時に一度だけ構築）
+_REGISTRATION_FIELDS = [
+    AuthField(
+        field_type=AuthFieldType.EMAIL,
+        selector='input[name="email"]',
+        name="email",
+        required=True,
+    ),
+    AuthField(
+        field_type=AuthFieldType.PASSWORD,
+        selector='input[name="password"]',
+        name="password",
+        required=True,
+    ),
+]
+
+
 class TestDynamicAuthService:
     """DynamicAuthServiceのテスト"""
     
@@ -36,52 +71,35 @@ class TestDynamicAuthService:
         password = self.service.generate_secure_password(length=20)
         assert len(password) == 20
     
-    def test_generate_secure_password_meets_default_requirements(self):
-        """生成されたパスワードがデフォルト要件を満たすこと"""
-        password = self.service.generate_secure_password()
-        
-        # 小文字を含む
-        assert re.search(r"[a-z]", password), "小文字が含まれていません"
-        # 大文字を含む
-        assert re.search(r"[A-Z]", password), "大文字が含まれていません"
-        # 数字を含む
-        assert re.search(r"[0-9]", password), "数字が含まれていません"
-    
-    def test_generate_secure_password_with_special_chars(self):
-        """特殊文字を含むパスワードが生成されること"""
-        requirements = {
+    @pytest.mark.parametrize("length,requirements,mask", [
+        # デフォルト要件: 小文字・大文字・数字
+        (16, None, 0b0111),
+        # 特殊文字必須
+        (16, {
             "min_length": 12,
             "require_uppercase": True,
             "require_lowercase": True,
             "require_digits": True,
             "require_special": True,
-        }
-        password = self.service.generate_secure_password(
-            length=16,
-            requirements=requirements,
-        )
-        
-        # 特殊文字を含む
-        assert re.search(r"[!@#$%^&*]", password), "特殊文字が含まれていません"
-    
-    def test_generate_secure_password_lowercase_only(self):
-        """小文字と数字のみのパスワードが生成されること（WILLER用）"""
-        requirements = {
+        }, 0b1111),
+        # 小文字と数字のみ（WILLER用）
+        (12, {
             "min_length": 8,
             "require_uppercase": False,
             "require_lowercase": True,
             "require_digits": True,
             "require_special": False,
-        }
+        }, 0b0101),
+    ])
+    def test_generate_secure_password_meets_requirements(self, length, requirements, mask):
+        """生成されたパスワードが要件の文字種を全て含むこと"""
         password = self.service.generate_secure_password(
-            length=12,
+            length=length,
             requirements=requirements,
         )
         
-        # 小文字を含む
-        assert re.search(r"[a-z]", password)
-        # 数字を含む
-        assert re.search(r"[0-9]", password)
+        assert len(password) == length
+        assert _char_classes(password) & mask == mask, f"必要な文字種が含まれていません: {password}"
     
     def test_generate_unique_passwords(self):
         """異なるパスワードが生成されること"""
@@ -207,26 +225,11 @@ class TestRegistrationConfig:
     
     def test_registration_config_with_fields(self):
         """フィールド付きRegistrationConfigが作成できること"""
-        fields = [
-            AuthField(
-                field_type=AuthFieldType.EMAIL,
-                selector='input[name="email"]',
-                name="email",
-                required=True,
-            ),
-            AuthField(
-                field_type=AuthFieldType.PASSWORD,
-                selector='input[name="password"]',
-                name="password",
-                required=True,
-            ),
-        ]
-        
         config = RegistrationConfig(
             service_name="test_service",
             registration_url="https://example.com/register",
             login_url="https://example.com/login",
-            fields=fields,
+            fields=_REGISTRATION_FIELDS,
             submit_selector='button[type="submit"]',
             password_requirements={"min_length": 8},
         )
@@ -1,49 +1,117 @@
 """
 Tests for EX Reservation Executor
 """
+import asyncio
+
 import pytest
 from unittest.mock import AsyncMock, MagicMock, patch
 
 from app.executors.ex_reservation_executor import EXReservationExecutor
 from app.executors.base import ExecutorFactory
 from app.models.schemas import SearchResult, ExecutionResult
+from tests.helpers import tid
+
+
+# テスト用SearchResultの雛形（検証済みモデルを一度だけ構築し、テストではコピーして使用）
+_BASE_SEARCH_RESULT = SearchResult(
+    id="test-001",
+    category="train",
+    title="新幹線予約 東京→新大阪",
+    url="https://expy.jp/reservation/",
+    details={
+        "departure": "東京",
+        "arrival": "新大阪",
+        "date": "2025-01-15",
+        "time": "10:00",
+        "train_name": "のぞみ",
+    },
+    execution_params={
+        "service_name": "ex_reservation",
+        "requires_login": True,
+    },
+)
+
+
+class _StubPage:
+    """統合テスト用の最小限のPageスタブ（AsyncMockより軽量）"""
+    url = "https://expy.jp/reservation/"
+    
+    async def goto(self, *args, **kwargs):
+        return None
+
+
+def _done(value):
+    """valueで解決済みのFutureを返す（awaitするとすぐにvalueが得られる）"""
+    future = asyncio.get_running_loop().create_future()
+    future.set_result(value)
+    return future
+
+
+def _async_return(value):
+    """常にvalueを返すコルーチン関数を生成"""
+    async def _stub(*args, **kwargs):
+        return value
+    return _stub
+
+
+@pytest.fixture(scope="module")
+def _shared_mock_page():
+    """モックPageの骨組み（モジュール内で一度だけ構築）"""
+    page = AsyncMock()
+    page.url = "https://expy.jp/reservation/"
+    page.goto = AsyncMock()
+    page.fill = AsyncMock()
+    page.click = AsyncMock()
+    page.wait_for_selector = AsyncMock()
+    page.wait_for_load_state = AsyncMock()
+    page.wait_for_timeout = AsyncMock()
+    page.query_selector = AsyncMock()
+    page.query_selector_all = AsyncMock()
+    page.evaluate = AsyncMock()
+    page.keyboard = MagicMock()
+    page.keyboard.press = AsyncMock()
+    return page
 
 
 class TestEXReservationExecutor:
     """EXReservationExecutor のテスト"""
     
+    @pytest.fixture(scope="class")
+    def executor(self):
+        """テスト対象のExecutor（クラス内で共有）"""
+        return EXReservationExecutor()
+    
     def test_executor_factory_returns_ex_executor(self):
         """ExecutorFactoryがEXReservationExecutorを返す"""
         executor = ExecutorFactory.get_executor("train")
         assert isinstance(executor, EXReservationExecutor)
         assert executor.service_name == "ex_reservation"
     
-    def test_ex_executor_service_name(self):
+    def test_ex_executor_service_name(self, executor):
         """サービス名がex_reservation"""
-        executor = EXReservationExecutor()
         assert executor.service_name == "ex_reservation"
     
-    def test_ex_executor_requires_login(self):
+    def test_ex_executor_requires_login(self, executor):
         """ログインが必要"""
-        executor = EXReservationExecutor()
         assert executor._requires_login() is True
     
-    def test_ex_executor_has_selectors(self):
+    def test_ex_executor_has_selectors(self, executor):
         """セレクタが定義されている（実サイト調査済み）"""
-        executor = EXReservationExecutor()
-        assert "login_button" in executor.SELECTORS
-        assert "member_id_input" in executor.SELECTORS
-        assert "password_input" in executor.SELECTORS
-        assert "departure_station" in executor.SELECTORS
-        assert "arrival_station" in executor.SELECTORS
-        assert "continue_button" in executor.SELECTORS  # 検索ボタン
-        assert "otp_input" in executor.SELECTORS  # ワンタイムパスワード
-    
-    def test_ex_executor_has_urls(self):
+        missing = {
+            "login_button",
+            "member_id_input",
+            "password_input",
+            "departure_station",
+            "arrival_station",
+            "continue_button",  # 検索ボタン
+            "otp_input",  # ワンタイムパスワード
+        } - executor.SELECTORS.keys()
+        assert not missing, f"未定義のセレクタ: {missing}"
+    
+    def test_ex_executor_has_urls(self, executor):
         """URLが定義されている（SmartEX実サイト調査済み）"""
-        executor = EXReservationExecutor()
-        assert "login" in executor.URLS
-        assert "my_page" in executor.URLS
+        missing = {"login", "my_page"} - executor.URLS.keys()
+        assert not missing, f"未定義のURL: {missing}"
         assert "smart" in executor.URLS["login"]  # SmartEXのURL
 
 
@@ -53,40 +121,13 @@ class TestEXReservationExecutorWithMock:
     @pytest.fixture
     def search_result(self):
         """テスト用SearchResult"""
-        return SearchResult(
-            id="test-001",
-            category="train",
-            title="新幹線予約 東京→新大阪",
-            url="https://expy.jp/reservation/",
-            details={
-                "departure": "東京",
-                "arrival": "新大阪",
-                "date": "2025-01-15",
-                "time": "10:00",
-                "train_name": "のぞみ",
-            },
-            execution_params={
-                "service_name": "ex_reservation",
-                "requires_login": True,
-            },
-        )
+        return _BASE_SEARCH_RESULT.model_copy(update={"id": tid("test")})
     
     @pytest.fixture
-    def mock_page(self):
-        """モックPage"""
-        page = AsyncMock()
-        page.url = "https://expy.jp/reservation/"
-        page.goto = AsyncMock()
-        page.fill = AsyncMock()
-        page.click = AsyncMock()
-        page.wait_for_selector = AsyncMock()
-        page.wait_for_load_state = AsyncMock()
-        page.wait_for_timeout = AsyncMock()
-        page.query_selector = AsyncMock()
-        page.evaluate = AsyncMock()
-        page.keyboard = MagicMock()
-        page.keyboard.press = AsyncMock()
-        return page
+    def mock_page(self, _shared_mock_page):
+        """モックPage（モジュール共有のモックを毎テストでリセット）"""
+        _shared_mock_page.reset_mock(return_value=True, side_effect=True)
+        return _shared_mock_page
     
     @pytest.mark.asyncio
     async def test_ensure_logged_in_already_logged_in(self, mock_page):
@@ -95,7 +136,7 @@ class TestEXReservationExecutorWithMock:
         
         # マイページリンクが表示されている
         mock_element = AsyncMock()
-        mock_page.query_selector = AsyncMock(return_value=mock_element)
+        mock_page.query_selector.return_value = mock_element
         
         result = await executor._ensure_logged_in(mock_page, None)
         
@@ -108,7 +149,7 @@ class TestEXReservationExecutorWithMock:
         executor = EXReservationExecutor()
         
         # ログインしていない状態
-        mock_page.query_selector = AsyncMock(return_value=None)
+        mock_page.query_selector.return_value = None
         
         result = await executor._ensure_logged_in(mock_page, None)
         
@@ -121,7 +162,7 @@ class TestEXReservationExecutorWithMock:
         executor = EXReservationExecutor()
         
         # ログインしていない状態
-        mock_page.query_selector = AsyncMock(return_value=None)
+        mock_page.query_selector.return_value = None
         
         result = await executor._ensure_logged_in(
             mock_page,
@@ -140,8 +181,8 @@ class TestEXReservationExecutorWithMock:
         mock_element = AsyncMock()
         mock_element.click = AsyncMock()
         mock_element.select_option = AsyncMock()
-        mock_page.query_selector = AsyncMock(return_value=mock_element)
-        mock_page.query_selector_all = AsyncMock(return_value=[mock_element] * 5)
+        mock_page.query_selector.return_value = mock_element
+        mock_page.query_selector_all.return_value = [mock_element] * 5
         
         result = await executor._enter_reservation_details(
             mock_page, "東京", "新大阪", "2025-01-15", "10:00"
@@ -151,17 +192,14 @@ class TestEXReservationExecutorWithMock:
         assert "入力しました" in result["message"]
     
     @pytest.mark.asyncio
-    async def test_search_and_select_train_no_results(self, mock_page):
+    async def test_search_and_select_train_no_results(self, mock_page, monkeypatch):
         """列車が見つからない場合"""
         executor = EXReservationExecutor()
         
-        # 「予約を続ける」ボタンあり、候補なし
-        async def query_side_effect(selector):
-            if "予約を続ける" in selector:
-                return AsyncMock()
-            return None
-        
-        mock_page.query_selector = AsyncMock(side_effect=query_side_effect)
+        # 「予約を続ける」ボタンあり、候補なし（解決済みFutureを返す同期モックで十分）
+        monkeypatch.setattr(mock_page, "query_selector", MagicMock(
+            side_effect=lambda selector: _done(AsyncMock() if "予約を続ける" in selector else None)
+        ))
         
         result = await executor._search_and_select_train(mock_page)
         
@@ -176,7 +214,7 @@ class TestEXReservationExecutorWithMock:
         # すべての要素が見つかる
         mock_element = AsyncMock()
         mock_element.click = AsyncMock()
-        mock_page.query_selector = AsyncMock(return_value=mock_element)
+        mock_page.query_selector.return_value = mock_element
         
         result = await executor._search_and_select_train(mock_page)
         
@@ -185,6 +223,7 @@ class TestEXReservationExecutorWithMock:
         assert "train_info" in result
 
 
+@pytest.mark.integration
 class TestIntegrationEXReservationExecutor:
     """統合テスト（実際のブラウザを使用しない）"""
     
@@ -193,62 +232,46 @@ class TestIntegrationEXReservationExecutor:
         """実行フロー全体のモックテスト"""
         executor = EXReservationExecutor()
         
-        search_result = SearchResult(
-            id="test-integration-001",
-            category="train",
-            title="新幹線予約テスト",
-            url="https://expy.jp/reservation/",
-            details={
-                "departure": "東京",
-                "arrival": "新大阪",
-                "date": "2025-01-15",
-                "time": "10:00",
-            },
-            execution_params={
-                "service_name": "ex_reservation",
-                "requires_login": True,
-            },
-        )
+        search_result = _BASE_SEARCH_RESULT.model_copy(update={"id": tid("test-integration")})
         
         credentials = {
             "email": "test_member_id",
             "password": "testpassword",
         }
         
-        with patch("app.executors.ex_reservation_executor.get_page") as mock_get_page, \
-             patch.object(executor, "_ensure_logged_in") as mock_login, \
-             patch.object(executor, "_enter_reservation_details") as mock_enter, \
-             patch.object(executor, "_search_and_select_train") as mock_search, \
-             patch.object(executor, "_update_progress") as mock_progress:
-            
-            # モックの設定
-            mock_page = AsyncMock()
-            mock_page.url = "https://expy.jp/reservation/"
-            mock_page.goto = AsyncMock()
-            mock_get_page.return_value = mock_page
-            
-            mock_login.return_value = {"success": True, "message": "ログイン成功"}
-            mock_enter.return_value = {"success": True, "message": "入力完了"}
-            mock_search.return_value = {
-                "success": True,
-                "message": "列車を選択しました",
-                "train_info": {"train_name": "のぞみ123号"},
-            }
-            
+        # executor自体はテストごとに生成するため、インスタンス属性を直接差し替える
+        progress_steps = []
+        
+        async def record_progress(*args, **kwargs):
+            progress_steps.append(kwargs.get("step"))
+        
+        executor._ensure_logged_in = _async_return({"success": True, "message": "ログイン成功"})
+        executor._enter_reservation_details = _async_return({"success": True, "message": "入力完了"})
+        executor._search_and_select_train = _async_return({
+            "success": True,
+            "message": "列車を選択しました",
+            "train_info": {"train_name": "のぞみ123号"},
+        })
+        executor._update_progress = record_progress
+        
+        with patch(
+            "app.executors.ex_reservation_executor.get_page",
+            new=_async_return(_StubPage()),
+        ):
             # 実行
             result = await executor._do_execute(
                 task_id="task-integration-001",
                 search_result=search_result,
                 credentials=credentials,
             )
-            
-            # 検証
-            assert result.success is True
-            assert "確認画面まで進みました" in result.message
-            assert result.confirmation_number is not None
-            assert result.details is not None
-            assert "departure" in result.details
-            assert "arrival" in result.details
-            
-            # 進捗更新が呼ばれたか確認
-            assert mock_progress.call_count >= 4  # 少なくとも4つのステップ
+        
+        # 検証
+        assert result.success is True
+        assert "確認画面まで進みました" in result.message
+        assert result.confirmation_number is not None
+        assert result.details is not None
+        assert "departure" in result.details
+        assert "arrival" in result.details
+        
+        # 進捗更新が呼ばれたか確認
+        assert len(progress_steps) >= 4  # 少なくとも4つのステップ
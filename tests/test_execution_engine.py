@@ -6,6 +6,15 @@ Phase 3B: 実行エンジン自動テスト
 """
 import pytest
 
+from app.agent.agent import AISecretaryAgent
+from app.executors.amazon_executor import AmazonExecutor
+from app.executors.base import BaseExecutor, ExecutorFactory, GenericExecutor
+from app.executors.ex_reservation_executor import EXReservationExecutor
+from app.models.schemas import ExecutionResult, ExecutionStatus, ExecutionStep, TaskType
+from app.services.credentials_service import get_credentials_service
+from app.services.execution_service import get_execution_service
+from tests.helpers import tid
+
 
 class TestExecutionStatusAPI:
     """実行状態API"""
@@ -37,12 +46,8 @@ class TestExecutionService:
     @pytest.mark.asyncio
     async def test_start_execution(self):
         """実行開始テスト"""
-        from app.services.execution_service import get_execution_service
-        from app.models.schemas import ExecutionStatus
-        import uuid
-        
         service = get_execution_service()
-        task_id = str(uuid.uuid4())
+        task_id = tid("task")
         user_id = "test-user"
         
         # 認証不要で実行開始
@@ -60,12 +65,8 @@ class TestExecutionService:
     @pytest.mark.asyncio
     async def test_start_execution_awaiting_credentials(self):
         """認証待ち状態テスト"""
-        from app.services.execution_service import get_execution_service
-        from app.models.schemas import ExecutionStatus
-        import uuid
-        
         service = get_execution_service()
-        task_id = str(uuid.uuid4())
+        task_id = tid("task")
         user_id = "test-user-no-creds"
         
         # 認証が必要なサービスで実行開始（認証情報なし）
@@ -82,12 +83,8 @@ class TestExecutionService:
     @pytest.mark.asyncio
     async def test_update_progress(self):
         """進捗更新テスト"""
-        from app.services.execution_service import get_execution_service
-        from app.models.schemas import ExecutionStatus, ExecutionStep
-        import uuid
-        
         service = get_execution_service()
-        task_id = str(uuid.uuid4())
+        task_id = tid("task")
         user_id = "test-user-progress"
         
         # 実行開始
@@ -110,12 +107,8 @@ class TestExecutionService:
     @pytest.mark.asyncio
     async def test_provide_credentials(self):
         """認証情報提供テスト"""
-        from app.services.execution_service import get_execution_service
-        from app.models.schemas import ExecutionStatus
-        import uuid
-        
         service = get_execution_service()
-        task_id = str(uuid.uuid4())
+        task_id = tid("task")
         user_id = "test-user-provide-creds"
         
         # 認証待ち状態で開始
@@ -140,12 +133,8 @@ class TestExecutionService:
     @pytest.mark.asyncio
     async def test_complete_execution(self):
         """実行完了テスト"""
-        from app.services.execution_service import get_execution_service
-        from app.models.schemas import ExecutionStatus, ExecutionResult
-        import uuid
-        
         service = get_execution_service()
-        task_id = str(uuid.uuid4())
+        task_id = tid("task")
         user_id = "test-user-complete"
         
         # 実行開始
@@ -174,12 +163,8 @@ class TestExecutionService:
     @pytest.mark.asyncio
     async def test_fail_execution(self):
         """実行失敗テスト"""
-        from app.services.execution_service import get_execution_service
-        from app.models.schemas import ExecutionStatus
-        import uuid
-        
         service = get_execution_service()
-        task_id = str(uuid.uuid4())
+        task_id = tid("task")
         user_id = "test-user-fail"
         
         # 実行開始
@@ -203,100 +188,45 @@ class TestCredentialsService:
     """認証情報サービスのユニットテスト"""
     
     @pytest.mark.asyncio
-    async def test_save_and_get_credential(self):
-        """認証情報の保存と取得"""
-        from app.services.credentials_service import get_credentials_service
-        import uuid
-        
+    async def test_credentials_service_lifecycle(self):
+        """保存→一覧→存在確認→取得→削除を1ユーザーで通しで検証"""
         service = get_credentials_service()
-        user_id = f"test-user-{uuid.uuid4().hex[:8]}"
+        user_id = tid("test-user-lifecycle")
         
-        # 保存
-        result = await service.save_credential(
-            user_id=user_id,
-            service="test_service",
-            credentials={"email": "test@example.com", "password": "secret123"},
-        )
-        assert result["success"] == True
+        # 保存前は存在しない
+        assert await service.has_credential(user_id=user_id, service="service1") == False
         
-        # 取得
-        cred = await service.get_credential(user_id=user_id, service="test_service")
-        assert cred is not None
-        assert cred["email"] == "test@example.com"
-        assert cred["password"] == "secret123"
-    
-    @pytest.mark.asyncio
-    async def test_list_credentials(self):
-        """認証情報一覧取得"""
-        from app.services.credentials_service import get_credentials_service
-        import uuid
-        
-        service = get_credentials_service()
-        user_id = f"test-user-list-{uuid.uuid4().hex[:8]}"
-        
-        # 複数保存
-        await service.save_credential(
-            user_id=user_id,
-            service="service1",
-            credentials={"email": "a@example.com", "password": "pass1"},
-        )
-        await service.save_credential(
-            user_id=user_id,
-            service="service2",
-            credentials={"email": "b@example.com", "password": "pass2"},
-        )
+        # 保存
+        for name, email, password in (
+            ("service1", "a@example.com", "pass1"),
+            ("service2", "b@example.com", "pass2"),
+        ):
+            result = await service.save_credential(
+                user_id=user_id,
+                service=name,
+                credentials={"email": email, "password": password},
+            )
+            assert result["success"] == True
         
         # 一覧取得
-        creds = await service.list_credentials(user_id=user_id)
-        services = [c["service"] for c in creds]
+        services = [c["service"] for c in await service.list_credentials(user_id=user_id)]
         assert "service1" in services
         assert "service2" in services
-    
-    @pytest.mark.asyncio
-    async def test_delete_credential(self):
-        """認証情報削除"""
-        from app.services.credentials_service import get_credentials_service
-        import uuid
         
-        service = get_credentials_service()
-        user_id = f"test-user-delete-{uuid.uuid4().hex[:8]}"
+        # 存在確認
+        assert await service.has_credential(user_id=user_id, service="service1") == True
         
-        # 保存
-        await service.save_credential(
-            user_id=user_id,
-            service="to_delete",
-            credentials={"email": "del@example.com", "password": "delpass"},
-        )
+        # 取得
+        cred = await service.get_credential(user_id=user_id, service="service1")
+        assert cred is not None
+        assert cred["email"] == "a@example.com"
+        assert cred["password"] == "pass1"
         
         # 削除
-        result = await service.delete_credential(user_id=user_id, service="to_delete")
+        result = await service.delete_credential(user_id=user_id, service="service1")
         assert result["success"] == True
-        
-        # 取得できないことを確認
-        cred = await service.get_credential(user_id=user_id, service="to_delete")
-        assert cred is None
-    
-    @pytest.mark.asyncio
-    async def test_has_credential(self):
-        """認証情報存在チェック"""
-        from app.services.credentials_service import get_credentials_service
-        import uuid
-        
-        service = get_credentials_service()
-        user_id = f"test-user-has-{uuid.uuid4().hex[:8]}"
-        
-        # 保存前
-        has = await service.has_credential(user_id=user_id, service="check_service")
-        assert has == False
-        
-        # 保存後
-        await service.save_credential(
-            user_id=user_id,
-            service="check_service",
-            credentials={"email": "check@example.com", "password": "checkpass"},
-        )
-        has = await service.has_credential(user_id=user_id, service="check_service")
-        assert has == True
+        assert await service.get_credential(user_id=user_id, service="service1") is None
+        assert await service.has_credential(user_id=user_id, service="service1") == False
 
 
 class TestExecutorFactory:
@@ -304,9 +234,6 @@ class TestExecutorFactory:
     
     def test_get_train_executor(self):
         """TrainExecutor取得"""
-        from app.executors.base import ExecutorFactory, BaseExecutor
-        from app.executors.ex_reservation_executor import EXReservationExecutor
-        
         executor = ExecutorFactory.get_executor("train")
         assert isinstance(executor, BaseExecutor)
         assert isinstance(executor, EXReservationExecutor)
@@ -314,9 +241,6 @@ class TestExecutorFactory:
     
     def test_get_product_executor(self):
         """ProductExecutor取得"""
-        from app.executors.base import ExecutorFactory, BaseExecutor
-        from app.executors.amazon_executor import AmazonExecutor
-        
         executor = ExecutorFactory.get_executor("product", "amazon")
         assert isinstance(executor, BaseExecutor)
         assert isinstance(executor, AmazonExecutor)
@@ -324,10 +248,19 @@ class TestExecutorFactory:
     
     def test_get_generic_executor(self):
         """GenericExecutor取得"""
-        from app.executors.base import ExecutorFactory, GenericExecutor
-        
         executor = ExecutorFactory.get_executor("unknown")
         assert isinstance(executor, GenericExecutor)
+    
+    def test_fixed_executor_is_shared(self):
+        """固定のExecutorは呼び出し方に関係なく同じインスタンスを返す"""
+        executor = ExecutorFactory.get_executor("train")
+        assert ExecutorFactory.get_executor(category="train") is executor
+    
+    def test_unknown_executor_is_not_cached(self):
+        """任意のサービス名のExecutorはキャッシュせず毎回生成する"""
+        first = ExecutorFactory.get_executor("product", "unknown-shop")
+        assert ExecutorFactory.get_executor("product", "unknown-shop") is not first
+        assert "unknown-shop" not in ExecutorFactory._shared_executors
 
 
 class TestSmartFallback:
@@ -336,9 +269,6 @@ class TestSmartFallback:
     @pytest.mark.asyncio
     async def test_generate_fallback_travel(self):
         """Test _generate_fallback_proposals for travel tasks"""
-        from app.agent.agent import AISecretaryAgent
-        from app.models.schemas import TaskType
-        
         agent = AISecretaryAgent()
         
         # Test travel fallback (should suggest distance-appropriate options)
@@ -359,9 +289,6 @@ class TestSmartFallback:
     @pytest.mark.asyncio
     async def test_generate_fallback_purchase(self):
         """Test _generate_fallback_proposals for purchase tasks"""
-        from app.agent.agent import AISecretaryAgent
-        from app.models.schemas import TaskType
-        
         agent = AISecretaryAgent()
         
         # Test purchase fallback
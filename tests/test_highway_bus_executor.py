@@ -9,53 +9,59 @@ from app.executors.base import ExecutorFactory
 from app.models.schemas import RegistrationConfig, AuthFieldType
 
 
+# 必須のセレクタ・URLキー
+_REQUIRED_SELECTORS = frozenset({
+    "login_link",
+    "login_id_input",
+    "password_input",
+    "login_button",
+    "register_link",
+    "book_button",
+    "mypage_link",
+})
+
+_REQUIRED_URLS = frozenset({
+    "top",
+    "login",
+    "register",
+    "mypage",
+    "bus_search",
+})
+
+
+@pytest.fixture(scope="module")
+def executor():
+    """テスト対象のExecutor（状態を変更しないためモジュール内で共有）"""
+    return HighwayBusExecutor()
+
+
 class TestHighwayBusExecutor:
     """HighwayBusExecutorのテスト"""
     
-    def setup_method(self):
-        """テストセットアップ"""
-        self.executor = HighwayBusExecutor()
-    
-    def test_service_name(self):
+    def test_service_name(self, executor):
         """サービス名がwillerであること"""
-        assert self.executor.service_name == "willer"
+        assert executor.service_name == "willer"
     
-    def test_has_selectors(self):
+    def test_has_selectors(self, executor):
         """必要なセレクタが定義されていること"""
-        required_selectors = [
-            "login_link",
-            "login_id_input",
-            "password_input",
-            "login_button",
-            "register_link",
-            "book_button",
-            "mypage_link",
-        ]
+        missing = _REQUIRED_SELECTORS - executor.SELECTORS.keys()
         
-        for selector_name in required_selectors:
-            assert selector_name in self.executor.SELECTORS, f"セレクタ '{selector_name}' が定義されていません"
+        assert not missing, f"セレクタ {missing} が定義されていません"
     
-    def test_has_urls(self):
+    def test_has_urls(self, executor):
         """必要なURLが定義されていること"""
-        required_urls = [
-            "top",
-            "login",
-            "register",
-            "mypage",
-            "bus_search",
-        ]
+        missing = _REQUIRED_URLS - executor.URLS.keys()
         
-        for url_name in required_urls:
-            assert url_name in self.executor.URLS, f"URL '{url_name}' が定義されていません"
+        assert not missing, f"URL {missing} が定義されていません"
     
-    def test_urls_are_valid_willer_urls(self):
+    def test_urls_are_valid_willer_urls(self, executor):
         """URLがWILLERドメインであること"""
-        for name, url in self.executor.URLS.items():
-            assert "willer" in url, f"URL '{name}' がWILLERドメインではありません: {url}"
+        non_willer = {name: url for name, url in executor.URLS.items() if "willer" not in url}
+        assert not non_willer, f"WILLERドメインではないURLがあります: {non_willer}"
     
-    def test_password_requirements(self):
+    def test_password_requirements(self, executor):
         """パスワード要件が定義されていること"""
-        requirements = self.executor.PASSWORD_REQUIREMENTS
+        requirements = executor.PASSWORD_REQUIREMENTS
         
         assert "min_length" in requirements
         assert requirements["min_length"] == 8
@@ -66,33 +72,29 @@ class TestHighwayBusExecutor:
 class TestBuildSearchUrl:
     """検索URL構築のテスト"""
     
-    def setup_method(self):
-        """テストセットアップ"""
-        self.executor = HighwayBusExecutor()
-    
-    def test_build_search_url_tokyo_osaka(self):
+    def test_build_search_url_tokyo_osaka(self, executor):
         """東京→大阪の検索URLが正しく生成されること"""
-        url = self.executor._build_search_url("東京", "大阪")
+        url = executor._build_search_url("東京", "大阪")
         
         assert "bus_search" in url
         assert "tokyo" in url
         assert "osaka" in url
     
-    def test_build_search_url_with_date(self):
+    def test_build_search_url_with_date(self, executor):
         """日付付きの検索URLが正しく生成されること"""
-        url = self.executor._build_search_url("東京", "大阪", "2024-12-25")
+        url = executor._build_search_url("東京", "大阪", "2024-12-25")
         
         assert "ym_202412" in url
     
-    def test_build_search_url_nagoya(self):
+    def test_build_search_url_nagoya(self, executor):
         """名古屋が正しくマッピングされること"""
-        url = self.executor._build_search_url("名古屋", "東京")
+        url = executor._build_search_url("名古屋", "東京")
         
         assert "aichi" in url or "nagoya" in url
     
-    def test_build_search_url_unknown_city(self):
+    def test_build_search_url_unknown_city(self, executor):
         """不明な都市はデフォルト値が使われること"""
-        url = self.executor._build_search_url("不明な都市", "大阪")
+        url = executor._build_search_url("不明な都市", "大阪")
         
         # デフォルトはtokyoにフォールバック
         assert "tokyo" in url
@@ -102,20 +104,16 @@ class TestBuildSearchUrl:
 class TestGetRegistrationConfig:
     """登録設定取得のテスト"""
     
-    def setup_method(self):
-        """テストセットアップ"""
-        self.executor = HighwayBusExecutor()
-    
-    def test_get_registration_config(self):
+    def test_get_registration_config(self, executor):
         """登録設定が取得できること"""
-        config = self.executor.get_registration_config()
+        config = executor.get_registration_config()
         
         assert isinstance(config, RegistrationConfig)
         assert config.service_name == "willer"
     
-    def test_registration_config_has_required_fields(self):
+    def test_registration_config_has_required_fields(self, executor):
         """登録設定に必要なフィールドが含まれていること"""
-        config = self.executor.get_registration_config()
+        config = executor.get_registration_config()
         
         field_types = [field.field_type for field in config.fields]
         
@@ -123,24 +121,24 @@ class TestGetRegistrationConfig:
         assert AuthFieldType.EMAIL in field_types
         assert AuthFieldType.PASSWORD in field_types
     
-    def test_registration_config_has_urls(self):
+    def test_registration_config_has_urls(self, executor):
         """登録設定にURLが含まれていること"""
-        config = self.executor.get_registration_config()
+        config = executor.get_registration_config()
         
         assert config.registration_url
         assert config.login_url
         assert "willer" in config.registration_url
         assert "willer" in config.login_url
     
-    def test_registration_config_has_submit_selector(self):
+    def test_registration_config_has_submit_selector(self, executor):
         """登録設定に送信ボタンセレクタが含まれていること"""
-        config = self.executor.get_registration_config()
+        config = executor.get_registration_config()
         
         assert config.submit_selector
     
-    def test_registration_config_has_password_requirements(self):
+    def test_registration_config_has_password_requirements(self, executor):
         """登録設定にパスワード要件が含まれていること"""
-        config = self.executor.get_registration_config()
+        config = executor.get_registration_config()
         
         assert config.password_requirements
         assert "min_length" in config.password_requirements
@@ -162,11 +160,7 @@ class TestExecutorFactory:
         
         assert hasattr(executor, "dynamic_auth")
         assert executor.dynamic_auth is not None
-
-
-
-
-
-
-
-
+    
+    def test_factory_reuses_executor_instance(self):
+        """同じカテゴリでは同一インスタンスが再利用されること"""
+        assert ExecutorFactory.get_executor("bus") is ExecutorFactory.get_executor("bus")
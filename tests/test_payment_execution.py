@@ -2,23 +2,183 @@
 Tests for Phase 8A: Payment Execution API
 """
 import pytest
-import uuid
-from datetime import datetime, timedelta
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from app.executors.bank_transfer_executor import BankTransferExecutor, BankTransferResult
+from app.services.auth_service import create_access_token
+from tests.helpers import FUTURE_DUE, next_invoice_suffix
+
+# サービス層をモックした単体テスト用のユーザー
+_UNIT_USER_ID = "user-payment-unit"
+_UNIT_INVOICE_ID = "invoice-payment-unit"
+
+
+@pytest.fixture
+def unit_headers():
+    """ユーザー登録を経ずに発行したJWTの認証ヘッダー"""
+    token = create_access_token(_UNIT_USER_ID, "payment-unit@example.com")
+    return {"Authorization": f"Bearer {token}"}
+
+
+@pytest.fixture
+def mock_executor():
+    """ルートが使う振込エグゼキューターのモック"""
+    executor = MagicMock()
+    executor.execute = AsyncMock()
+    executor.get_execution_status = AsyncMock(return_value=None)
+    with patch("app.api.invoice_routes.get_bank_transfer_executor", return_value=executor):
+        yield executor
+
+
+@pytest.fixture
+def mock_invoice_service():
+    """ルートが使う請求書サービスのモック"""
+    service = MagicMock()
+    service.list_invoices = AsyncMock(return_value=([], 0))
+    with patch("app.api.invoice_routes.get_invoice_service", return_value=service):
+        yield service
+
+
+class TestPaymentExecutionRoutes:
+    """支払い実行APIのテスト（エグゼキューター・サービス層をモック）"""
+    
+    def test_execute_payment_simulation(self, client, unit_headers, mock_executor):
+        """承認済み請求書の支払い結果と実行IDを返すこと"""
+        mock_executor.execute.return_value = BankTransferResult(
+            success=True,
+            message="シミュレーション振込が完了しました",
+            transaction_id="SIM-0001",
+        )
+        mock_executor.get_execution_status.return_value = {"execution_id": "exec-1"}
+        
+        response = client.post(
+            f"/api/v1/invoices/{_UNIT_INVOICE_ID}/pay",
+            headers=unit_headers,
+            json={"bank_type": "simulation"}
+        )
+        
+        assert response.status_code == 200
+        data = response.json()
+        assert data["invoice_id"] == _UNIT_INVOICE_ID
+        assert data["execution_id"] == "exec-1"
+        assert data["status"] == "completed"
+        mock_executor.execute.assert_awaited_once_with(
+            invoice_id=_UNIT_INVOICE_ID,
+            user_id=_UNIT_USER_ID,
+            bank_type="simulation",
+        )
+    
+    def test_execute_payment_failure_mapping(self, client, unit_headers, mock_executor):
+        """振込失敗の結果をstatus=failed・空の実行IDとして返すこと"""
+        mock_executor.execute.return_value = BankTransferResult(
+            success=False,
+            message="failed",
+            error_code="EXECUTION_ERROR",
+        )
+        
+        response = client.post(
+            f"/api/v1/invoices/{_UNIT_INVOICE_ID}/pay",
+            headers=unit_headers,
+            json={"bank_type": "simulation"}
+        )
+        
+        assert response.status_code == 200
+        data = response.json()
+        assert data["status"] == "failed"
+        assert data["execution_id"] == ""
+    
+    def test_get_payment_status(self, client, unit_headers, mock_executor):
+        """実行ログの内容を支払い状況として返すこと"""
+        mock_executor.get_execution_status.return_value = {
+            "execution_id": "exec-1",
+            "status": "completed",
+            "current_step": "completed",
+            "steps_completed": ["opened_url", "completed"],
+            "steps_remaining": [],
+            "transaction_id": "SIM-0001",
+        }
+        
+        response = client.get(
+            f"/api/v1/invoices/{_UNIT_INVOICE_ID}/payment-status",
+            headers=unit_headers,
+        )
+        
+        assert response.status_code == 200
+        data = response.json()
+        assert data["invoice_id"] == _UNIT_INVOICE_ID
+        assert data["status"] == "completed"
+        assert data["execution_id"] == "exec-1"
+        assert data["transaction_id"].startswith("SIM-")
+        mock_executor.get_execution_status.assert_awaited_once_with(_UNIT_INVOICE_ID, _UNIT_USER_ID)
+    
+    def test_get_payment_status_no_execution(
+        self, client, unit_headers, mock_executor, mock_invoice_service
+    ):
+        """実行ログがない場合は請求書のステータスから判定すること"""
+        mock_invoice_service.list_invoices.return_value = (
+            [{"id": _UNIT_INVOICE_ID, "status": "pending"}],
+            1,
+        )
+        
+        response = client.get(
+            f"/api/v1/invoices/{_UNIT_INVOICE_ID}/payment-status",
+            headers=unit_headers,
+        )
+        
+        assert response.status_code == 200
+        data = response.json()
+        assert data["invoice_id"] == _UNIT_INVOICE_ID
+        assert data["status"] == "pending"
+    
+    def test_get_payment_status_invoice_not_found(
+        self, client, unit_headers, mock_executor, mock_invoice_service
+    ):
+        """実行ログも請求書もない場合は404を返すこと"""
+        response = client.get(
+            f"/api/v1/invoices/{_UNIT_INVOICE_ID}/payment-status",
+            headers=unit_headers,
+        )
+        
+        assert response.status_code == 404
+
+
+class TestBankTransferExecutor:
+    """振込エグゼキューターのテスト（Supabaseをモック）"""
+    
+    @pytest.mark.asyncio
+    async def test_execute_rejects_unapproved_invoice(self, mock_supabase):
+        """承認済みでない請求書はINVALID_STATUSで拒否し、実行ログを作らないこと"""
+        mock_supabase.execute.return_value = MagicMock(
+            data=[{"id": _UNIT_INVOICE_ID, "status": "pending", "amount": 50000}]
+        )
+        with patch("app.services.supabase_client.get_supabase_client") as mock_client:
+            mock_client.return_value.client = mock_supabase
+            executor = BankTransferExecutor()
+        
+        result = await executor.execute(
+            invoice_id=_UNIT_INVOICE_ID,
+            user_id=_UNIT_USER_ID,
+            bank_type="simulation",
+        )
+        
+        assert result.success is False
+        assert result.error_code == "INVALID_STATUS"
+        mock_supabase.insert.assert_not_called()
 
 
 class TestPaymentExecutionAPI:
     """支払い実行APIのテスト"""
     
-    def create_test_invoice(self, client, auth_token):
+    def create_test_invoice(self, client, session_auth_token):
         """テスト用の請求書を作成"""
-        unique_id = uuid.uuid4().hex[:6]
+        unique_id = next_invoice_suffix()
         response = client.post(
             "/api/v1/invoices",
-            headers={"Authorization": f"Bearer {auth_token}"},
+            headers={"Authorization": f"Bearer {session_auth_token}"},
             json={
                 "sender_name": f"テスト会社_{unique_id}",
                 "amount": 50000,
-                "due_date": (datetime.now() + timedelta(days=30)).strftime("%Y-%m-%d"),
+                "due_date": FUTURE_DUE,
                 "source": "manual",
                 "source_channel": "test",
                 "bank_info": {
@@ -33,31 +193,32 @@ class TestPaymentExecutionAPI:
         assert response.status_code == 200
         return response.json()
     
-    def approve_invoice(self, client, auth_token, invoice_id):
+    def approve_invoice(self, client, session_auth_token, invoice_id):
         """請求書を承認"""
         response = client.post(
             f"/api/v1/invoices/{invoice_id}/approve",
-            headers={"Authorization": f"Bearer {auth_token}"},
+            headers={"Authorization": f"Bearer {session_auth_token}"},
             json={}
         )
         assert response.status_code == 200
         return response.json()
     
-    def test_execute_payment_simulation(self, client, auth_token):
-        """シミュレーション支払い実行テスト"""
+    @pytest.mark.e2e
+    def test_execute_payment_simulation_end_to_end(self, client, session_auth_token):
+        """作成→承認→支払い→状況取得を実APIで通すテスト"""
         # 請求書を作成
-        invoice = self.create_test_invoice(client, auth_token)
+        invoice = self.create_test_invoice(client, session_auth_token)
         invoice_id = invoice["id"]
         assert invoice["status"] == "pending"
         
         # 承認
-        approved = self.approve_invoice(client, auth_token, invoice_id)
+        approved = self.approve_invoice(client, session_auth_token, invoice_id)
         assert approved["status"] == "approved"
         
         # 支払い実行
         response = client.post(
             f"/api/v1/invoices/{invoice_id}/pay",
-            headers={"Authorization": f"Bearer {auth_token}"},
+            headers={"Authorization": f"Bearer {session_auth_token}"},
             json={"bank_type": "simulation"}
         )
         
@@ -68,45 +229,11 @@ class TestPaymentExecutionAPI:
         assert data["status"] == "completed"
         assert "execution_id" in data
         assert "シミュレーション" in data["message"] or "SIM" in data["message"]
-    
-    def test_execute_payment_not_approved(self, client, auth_token):
-        """未承認の請求書への支払いは失敗するテスト"""
-        # 請求書を作成（承認しない）
-        invoice = self.create_test_invoice(client, auth_token)
-        invoice_id = invoice["id"]
-        assert invoice["status"] == "pending"
-        
-        # 支払い実行（失敗するはず）
-        response = client.post(
-            f"/api/v1/invoices/{invoice_id}/pay",
-            headers={"Authorization": f"Bearer {auth_token}"},
-            json={"bank_type": "simulation"}
-        )
-        
-        assert response.status_code == 200
-        data = response.json()
-        
-        assert data["status"] == "failed"
-        assert "承認済みではありません" in data["message"]
-    
-    def test_get_payment_status(self, client, auth_token):
-        """支払い状況取得テスト"""
-        # 請求書を作成して承認
-        invoice = self.create_test_invoice(client, auth_token)
-        invoice_id = invoice["id"]
-        self.approve_invoice(client, auth_token, invoice_id)
-        
-        # 支払い実行
-        client.post(
-            f"/api/v1/invoices/{invoice_id}/pay",
-            headers={"Authorization": f"Bearer {auth_token}"},
-            json={"bank_type": "simulation"}
-        )
         
         # 支払い状況を取得
         response = client.get(
             f"/api/v1/invoices/{invoice_id}/payment-status",
-            headers={"Authorization": f"Bearer {auth_token}"}
+            headers={"Authorization": f"Bearer {session_auth_token}"}
         )
         
         assert response.status_code == 200
@@ -114,29 +241,9 @@ class TestPaymentExecutionAPI:
         
         assert data["invoice_id"] == invoice_id
         assert data["status"] == "completed"
-        assert "execution_id" in data
-        assert "transaction_id" in data
         assert data["transaction_id"] is not None
         assert data["transaction_id"].startswith("SIM-")
     
-    def test_get_payment_status_no_execution(self, client, auth_token):
-        """未実行の請求書の支払い状況取得テスト"""
-        # 請求書を作成のみ
-        invoice = self.create_test_invoice(client, auth_token)
-        invoice_id = invoice["id"]
-        
-        # 支払い状況を取得
-        response = client.get(
-            f"/api/v1/invoices/{invoice_id}/payment-status",
-            headers={"Authorization": f"Bearer {auth_token}"}
-        )
-        
-        assert response.status_code == 200
-        data = response.json()
-        
-        assert data["invoice_id"] == invoice_id
-        assert data["status"] == "pending"
-    
     def test_payment_unauthenticated_rejected(self, client):
         """認証なしの支払い実行は拒否されるテスト"""
         response = client.post(
@@ -149,6 +256,3 @@ class TestPaymentExecutionAPI:
         """認証なしの支払い状況取得は拒否されるテスト"""
         response = client.get("/api/v1/invoices/some-id/payment-status")
         assert response.status_code == 401
-
-
-
@@ -2,24 +2,24 @@
 Tests for Phase 7D: Payment Scheduler
 """
 import pytest
-import uuid
-from datetime import datetime, timedelta
 from unittest.mock import patch, MagicMock
 
+from tests.helpers import FUTURE_DUE, next_invoice_suffix
+
 
 class TestPaymentScheduler:
     """支払いスケジューラのテスト"""
     
-    def create_test_invoice(self, client, auth_token, scheduled_time=None):
+    def create_test_invoice(self, client, session_auth_token, scheduled_time=None):
         """テスト用の請求書を作成"""
-        unique_id = uuid.uuid4().hex[:6]
+        unique_id = next_invoice_suffix()
         response = client.post(
             "/api/v1/invoices",
-            headers={"Authorization": f"Bearer {auth_token}"},
+            headers={"Authorization": f"Bearer {session_auth_token}"},
             json={
                 "sender_name": f"スケジューラテスト_{unique_id}",
                 "amount": 30000,
-                "due_date": (datetime.now() + timedelta(days=30)).strftime("%Y-%m-%d"),
+                "due_date": FUTURE_DUE,
                 "source": "manual",
                 "source_channel": "test",
                 "bank_info": {
@@ -34,11 +34,11 @@ class TestPaymentScheduler:
         assert response.status_code == 200
         return response.json()
     
-    def approve_invoice(self, client, auth_token, invoice_id):
+    def approve_invoice(self, client, session_auth_token, invoice_id):
         """請求書を承認"""
         response = client.post(
             f"/api/v1/invoices/{invoice_id}/approve",
-            headers={"Authorization": f"Bearer {auth_token}"},
+            headers={"Authorization": f"Bearer {session_auth_token}"},
             json={}
         )
         assert response.status_code == 200
@@ -87,14 +87,14 @@ class TestPaymentScheduler:
         if "error" not in result:
             assert "processed" in result
     
-    def test_invoice_approval_sets_scheduled_time(self, client, auth_token):
+    def test_invoice_approval_sets_scheduled_time(self, client, session_auth_token):
         """請求書承認時にscheduled_payment_timeが設定されることを確認"""
         # 請求書を作成
-        invoice = self.create_test_invoice(client, auth_token)
+        invoice = self.create_test_invoice(client, session_auth_token)
         invoice_id = invoice["id"]
         
         # 承認
-        approved = self.approve_invoice(client, auth_token, invoice_id)
+        approved = self.approve_invoice(client, session_auth_token, invoice_id)
         
         # scheduled_payment_timeが設定されている
         assert approved["status"] == "approved"
@@ -1,6 +1,7 @@
 """
 Phase 5: Message Detection - Unit Tests
 """
+import base64
 import pytest
 from unittest.mock import Mock, AsyncMock, patch, MagicMock
 from datetime import datetime
@@ -13,34 +14,39 @@ from app.models.detection_schemas import (
     ContentType,
     StorageType,
 )
+from app.services.attachment_service import AttachmentService
+from app.services.chat_service import ChatService
+from app.services.gmail_service import GmailService
+from app.services.message_detection import MessageDetectionService
+
+# モックのレコード用タイムスタンプ（構造のみ検証するためモジュールで1回だけ生成）
+_NOW_ISO = datetime.utcnow().isoformat()
+
+# Gmail APIのメッセージ本文と同じurlsafe base64で符号化したプレーンテキスト
+_HELLO_B64 = base64.urlsafe_b64encode(b"Hello World").decode()
+
+# b"test data" のSHA-256（添付ファイルのチェックサム検証用）
+_TEST_DATA_SHA256 = "916f0027a575074ce72a331777c3478d6513f786a591bd892da1a577bf2335f9"
+
+
+class _Result:
+    """Supabaseのexecute()結果の代用（サービスが参照するdataとcountだけを持つ）"""
+    __slots__ = ("data", "count")
+    
+    def __init__(self, data=None, count=0):
+        self.data = [] if data is None else data
+        self.count = count
 
 
 class TestMessageDetectionService:
     """Phase 5A: Doneチャット検知サービスのテスト"""
     
-    @pytest.fixture
-    def mock_supabase(self):
-        """Supabaseモック"""
-        mock = MagicMock()
-        mock.table.return_value = mock
-        mock.select.return_value = mock
-        mock.insert.return_value = mock
-        mock.update.return_value = mock
-        mock.eq.return_value = mock
-        mock.order.return_value = mock
-        mock.limit.return_value = mock
-        mock.offset.return_value = mock
-        mock.execute.return_value = MagicMock(data=[], count=0)
-        return mock
-    
     @pytest.fixture
     def detection_service(self, mock_supabase):
         """MessageDetectionServiceのテストインスタンス"""
         with patch('app.services.message_detection.get_supabase_client') as mock_client:
             mock_client.return_value.client = mock_supabase
-            from app.services.message_detection import MessageDetectionService
             service = MessageDetectionService()
-            service.supabase = mock_supabase
             return service
     
     @pytest.mark.asyncio
@@ -48,14 +54,14 @@ class TestMessageDetectionService:
         """新しいメッセージを検知して保存できること"""
         # Setup - first call returns empty (no duplicate), second returns inserted data
         mock_supabase.execute.side_effect = [
-            MagicMock(data=[]),  # duplicate check returns empty
-            MagicMock(data=[{  # insert returns the new record
+            _Result(data=[]),  # duplicate check returns empty
+            _Result(data=[{  # insert returns the new record
                 "id": "test-id",
                 "user_id": "user-1",
                 "source": "done_chat",
                 "content": "テストメッセージ",
                 "status": "pending",
-                "created_at": datetime.utcnow().isoformat(),
+                "created_at": _NOW_ISO,
             }]),
         ]
         
@@ -74,7 +80,7 @@ class TestMessageDetectionService:
     async def test_detect_message_skips_duplicate(self, detection_service, mock_supabase):
         """重複メッセージをスキップすること"""
         # Setup - 既存メッセージを返す
-        mock_supabase.execute.return_value = MagicMock(data=[{
+        mock_supabase.execute.return_value = _Result(data=[{
             "id": "existing-id",
         }])
         
@@ -94,7 +100,7 @@ class TestMessageDetectionService:
     async def test_update_message_status(self, detection_service, mock_supabase):
         """メッセージステータスを更新できること"""
         # Setup
-        mock_supabase.execute.return_value = MagicMock(data=[{
+        mock_supabase.execute.return_value = _Result(data=[{
             "id": "msg-1",
             "status": "processed",
             "content_type": "invoice",
@@ -116,7 +122,7 @@ class TestMessageDetectionService:
     async def test_get_pending_messages(self, detection_service, mock_supabase):
         """未処理メッセージを取得できること"""
         # Setup
-        mock_supabase.execute.return_value = MagicMock(data=[
+        mock_supabase.execute.return_value = _Result(data=[
             {"id": "msg-1", "status": "pending"},
             {"id": "msg-2", "status": "pending"},
         ])
@@ -132,112 +138,84 @@ class TestMessageDetectionService:
 class TestChatServiceDetectionHook:
     """Phase 5A: ChatServiceの検知フックのテスト"""
     
-    @pytest.fixture
-    def mock_supabase(self):
-        """Supabaseモック"""
-        mock = MagicMock()
-        mock.table.return_value = mock
-        mock.select.return_value = mock
-        mock.insert.return_value = mock
-        mock.eq.return_value = mock
-        mock.execute.return_value = MagicMock(data=[])
-        return mock
-    
     @pytest.mark.asyncio
-    async def test_send_message_triggers_detection_when_ai_enabled(self, mock_supabase):
+    @patch('app.services.message_detection.get_detection_service')
+    @patch('app.services.chat_service.get_supabase_client')
+    async def test_send_message_triggers_detection_when_ai_enabled(
+        self, mock_client, mock_detection, mock_supabase
+    ):
         """AI有効ルームでメッセージ送信時に検知がトリガーされること"""
-        with patch('app.services.chat_service.get_supabase_client') as mock_client:
-            mock_client.return_value.client = mock_supabase
-            
-            # Setup
-            # 1. メンバーシップチェック
-            mock_supabase.execute.side_effect = [
-                MagicMock(data=[{"user_id": "sender-1", "room_id": "room-1"}]),  # membership
-                MagicMock(data=[{"display_name": "Test User", "done_user_id": "done-user-1"}]),  # sender
-                MagicMock(data=[{"id": "msg-1", "room_id": "room-1", "sender_id": "sender-1", "sender_type": "human", "content": "test", "created_at": datetime.utcnow().isoformat()}]),  # insert
-                MagicMock(data=[{"enabled": True, "mode": "auto"}]),  # ai_settings
-                MagicMock(data=[]),  # duplicate check
-                MagicMock(data=[{"id": "detected-1"}]),  # detection insert
-            ]
-            
-            from app.services.chat_service import ChatService
-            service = ChatService()
-            service.supabase = mock_supabase
-            
-            with patch('app.services.message_detection.get_detection_service') as mock_detection:
-                mock_detection_service = AsyncMock()
-                mock_detection.return_value = mock_detection_service
-                
-                # Execute
-                result = await service.send_message(
-                    room_id="room-1",
-                    sender_id="sender-1",
-                    content="テストメッセージ",
-                )
-                
-                # Verify
-                assert result["id"] == "msg-1"
+        mock_client.return_value.client = mock_supabase
+        mock_detection.return_value = AsyncMock()
+        
+        # Setup
+        # 1. メンバーシップチェック
+        mock_supabase.execute.side_effect = [
+            _Result(data=[{"user_id": "sender-1", "room_id": "room-1"}]),  # membership
+            _Result(data=[{"display_name": "Test User", "done_user_id": "done-user-1"}]),  # sender
+            _Result(data=[{"id": "msg-1", "room_id": "room-1", "sender_id": "sender-1", "sender_type": "human", "content": "test", "created_at": _NOW_ISO}]),  # insert
+            _Result(data=[{"enabled": True, "mode": "auto"}]),  # ai_settings
+            _Result(data=[]),  # duplicate check
+            _Result(data=[{"id": "detected-1"}]),  # detection insert
+        ]
+        
+        service = ChatService()
+        
+        # Execute
+        result = await service.send_message(
+            room_id="room-1",
+            sender_id="sender-1",
+            content="テストメッセージ",
+        )
+        
+        # Verify
+        assert result["id"] == "msg-1"
     
     @pytest.mark.asyncio
-    async def test_send_message_skips_detection_when_ai_disabled(self, mock_supabase):
+    @patch('app.services.message_detection.get_detection_service')
+    @patch('app.services.chat_service.get_supabase_client')
+    async def test_send_message_skips_detection_when_ai_disabled(
+        self, mock_client, mock_detection, mock_supabase
+    ):
         """AI無効ルームでは検知がスキップされること"""
-        with patch('app.services.chat_service.get_supabase_client') as mock_client:
-            mock_client.return_value.client = mock_supabase
-            
-            # Setup
-            mock_supabase.execute.side_effect = [
-                MagicMock(data=[{"user_id": "sender-1", "room_id": "room-1"}]),  # membership
-                MagicMock(data=[{"display_name": "Test User", "done_user_id": "done-user-1"}]),  # sender
-                MagicMock(data=[{"id": "msg-1", "room_id": "room-1", "sender_id": "sender-1", "sender_type": "human", "content": "test", "created_at": datetime.utcnow().isoformat()}]),  # insert
-                MagicMock(data=[{"enabled": False, "mode": "off"}]),  # ai_settings - disabled
-            ]
-            
-            from app.services.chat_service import ChatService
-            service = ChatService()
-            service.supabase = mock_supabase
-            
-            with patch('app.services.message_detection.get_detection_service') as mock_detection:
-                mock_detection_service = AsyncMock()
-                mock_detection.return_value = mock_detection_service
-                
-                # Execute
-                result = await service.send_message(
-                    room_id="room-1",
-                    sender_id="sender-1",
-                    content="テストメッセージ",
-                )
-                
-                # Verify
-                assert result["id"] == "msg-1"
-                # 検知は呼ばれない
-                mock_detection_service.detect_message.assert_not_called()
+        mock_client.return_value.client = mock_supabase
+        mock_detection_service = AsyncMock()
+        mock_detection.return_value = mock_detection_service
+        
+        # Setup
+        mock_supabase.execute.side_effect = [
+            _Result(data=[{"user_id": "sender-1", "room_id": "room-1"}]),  # membership
+            _Result(data=[{"display_name": "Test User", "done_user_id": "done-user-1"}]),  # sender
+            _Result(data=[{"id": "msg-1", "room_id": "room-1", "sender_id": "sender-1", "sender_type": "human", "content": "test", "created_at": _NOW_ISO}]),  # insert
+            _Result(data=[{"enabled": False, "mode": "off"}]),  # ai_settings - disabled
+        ]
+        
+        service = ChatService()
+        
+        # Execute
+        result = await service.send_message(
+            room_id="room-1",
+            sender_id="sender-1",
+            content="テストメッセージ",
+        )
+        
+        # Verify
+        assert result["id"] == "msg-1"
+        # 検知は呼ばれない
+        mock_detection_service.detect_message.assert_not_called()
 
 
 class TestGmailService:
     """Phase 5B: Gmailサービスのテスト"""
     
-    @pytest.fixture
-    def mock_supabase(self):
-        """Supabaseモック"""
-        mock = MagicMock()
-        mock.table.return_value = mock
-        mock.select.return_value = mock
-        mock.insert.return_value = mock
-        mock.update.return_value = mock
-        mock.eq.return_value = mock
-        mock.execute.return_value = MagicMock(data=[])
-        return mock
-    
     @pytest.mark.asyncio
     async def test_get_connection_status_not_connected(self, mock_supabase):
         """未接続状態を正しく返すこと"""
         with patch('app.services.gmail_service.get_supabase_client') as mock_client:
             mock_client.return_value.client = mock_supabase
-            mock_supabase.execute.return_value = MagicMock(data=[])
+            mock_supabase.execute.return_value = _Result(data=[])
             
-            from app.services.gmail_service import GmailService
             service = GmailService()
-            service.supabase = mock_supabase
             
             # Execute
             status = await service.get_connection_status("user-1")
@@ -251,15 +229,13 @@ class TestGmailService:
         """接続状態を正しく返すこと"""
         with patch('app.services.gmail_service.get_supabase_client') as mock_client:
             mock_client.return_value.client = mock_supabase
-            mock_supabase.execute.return_value = MagicMock(data=[{
+            mock_supabase.execute.return_value = _Result(data=[{
                 "email": "test@gmail.com",
                 "last_sync_at": "2024-01-01T00:00:00Z",
                 "is_active": True,
             }])
             
-            from app.services.gmail_service import GmailService
             service = GmailService()
-            service.supabase = mock_supabase
             
             # Execute
             status = await service.get_connection_status("user-1")
@@ -272,9 +248,6 @@ class TestGmailService:
     def test_extract_body_plain_text(self):
         """プレーンテキストの本文を抽出できること"""
         with patch('app.services.gmail_service.get_supabase_client'):
-            from app.services.gmail_service import GmailService
-            import base64
-            
             service = GmailService()
             
             payload = {
@@ -282,7 +255,7 @@ class TestGmailService:
                     {
                         "mimeType": "text/plain",
                         "body": {
-                            "data": base64.urlsafe_b64encode("Hello World".encode()).decode()
+                            "data": _HELLO_B64
                         }
                     }
                 ]
@@ -297,8 +270,6 @@ class TestGmailService:
     def test_extract_attachment_info(self):
         """添付ファイル情報を抽出できること"""
         with patch('app.services.gmail_service.get_supabase_client'):
-            from app.services.gmail_service import GmailService
-            
             service = GmailService()
             
             payload = {
@@ -335,20 +306,6 @@ class TestGmailService:
 class TestAttachmentService:
     """Phase 5C: 添付ファイルサービスのテスト"""
     
-    @pytest.fixture
-    def mock_supabase(self):
-        """Supabaseモック"""
-        mock = MagicMock()
-        mock.table.return_value = mock
-        mock.select.return_value = mock
-        mock.insert.return_value = mock
-        mock.delete.return_value = mock
-        mock.eq.return_value = mock
-        mock.order.return_value = mock
-        mock.lt.return_value = mock
-        mock.execute.return_value = MagicMock(data=[])
-        return mock
-    
     @pytest.fixture
     def attachment_service(self, mock_supabase, tmp_path):
         """AttachmentServiceのテストインスタンス"""
@@ -358,9 +315,7 @@ class TestAttachmentService:
                 mock_settings.ATTACHMENT_STORAGE_PATH = str(tmp_path)
                 mock_settings.ATTACHMENT_MAX_SIZE_MB = 10
                 
-                from app.services.attachment_service import AttachmentService
                 service = AttachmentService()
-                service.supabase = mock_supabase
                 return service
     
     def test_calculate_checksum(self, attachment_service):
@@ -369,15 +324,17 @@ class TestAttachmentService:
         checksum = attachment_service._calculate_checksum(data)
         
         assert len(checksum) == 64  # SHA256 hex
-        assert checksum == "916f0027a575074ce72a331777c3478d6513f786a591bd892da1a577bf2335f9"
+        assert checksum == _TEST_DATA_SHA256
+        # バッファプロトコルの入力もコピーせずそのままハッシュできること
+        assert attachment_service._calculate_checksum(memoryview(bytearray(data))) == _TEST_DATA_SHA256
     
     @pytest.mark.asyncio
     async def test_save_attachment_success(self, attachment_service, mock_supabase, tmp_path):
         """添付ファイルを保存できること"""
         # Setup
         mock_supabase.execute.side_effect = [
-            MagicMock(data=[]),  # duplicate check
-            MagicMock(data=[{
+            _Result(data=[]),  # duplicate check
+            _Result(data=[{
                 "id": "att-1",
                 "detected_message_id": "msg-1",
                 "filename": "test.pdf",
@@ -401,10 +358,11 @@ class TestAttachmentService:
         mock_supabase.insert.assert_called_once()
     
     @pytest.mark.asyncio
-    async def test_save_attachment_size_limit(self, attachment_service):
+    async def test_save_attachment_size_limit(self, attachment_service, monkeypatch):
         """ファイルサイズ制限が適用されること"""
-        # 11MBのデータ（10MB制限を超過）
-        large_data = b"x" * (11 * 1024 * 1024)
+        # 制限を16バイトに下げ、17バイトのデータで超過させる（実際の10MB超のデータは確保しない）
+        monkeypatch.setattr("app.services.attachment_service.MAX_FILE_SIZE", 16)
+        large_data = b"x" * 17
         
         with pytest.raises(ValueError, match="File size exceeds limit"):
             await attachment_service.save_attachment(
@@ -419,7 +377,7 @@ class TestAttachmentService:
     async def test_get_attachments_for_message(self, attachment_service, mock_supabase):
         """メッセージの添付ファイル一覧を取得できること"""
         # Setup
-        mock_supabase.execute.return_value = MagicMock(data=[
+        mock_supabase.execute.return_value = _Result(data=[
             {"id": "att-1", "filename": "file1.pdf"},
             {"id": "att-2", "filename": "file2.png"},
         ])
@@ -434,13 +392,6 @@ class TestAttachmentService:
 class TestDetectionRoutes:
     """Detection APIルートのテスト"""
     
-    @pytest.fixture
-    def client(self):
-        """テストクライアント"""
-        from fastapi.testclient import TestClient
-        from main import app
-        return TestClient(app)
-    
     def test_list_detected_messages(self, client):
         """検知メッセージ一覧APIが動作すること"""
         with patch('app.api.detection_routes.get_detection_service') as mock:
@@ -460,13 +411,6 @@ class TestDetectionRoutes:
 class TestGmailRoutes:
     """Gmail APIルートのテスト"""
     
-    @pytest.fixture
-    def client(self):
-        """テストクライアント"""
-        from fastapi.testclient import TestClient
-        from main import app
-        return TestClient(app)
-    
     def test_gmail_status_not_connected(self, client):
         """Gmail未接続状態を取得できること"""
         with patch('app.api.gmail_routes.get_gmail_service') as mock:
@@ -14,6 +14,23 @@ from app.tools.product_search import (
 from app.models.schemas import SearchResultCategory
 
 
+@pytest.fixture(autouse=True)
+def _no_sleep(monkeypatch):
+    """検索ツールのページ読み込み待ち（asyncio.sleep）を即時に完了させる"""
+    async def _fast_sleep(*args, **kwargs):
+        return None
+    
+    monkeypatch.setattr("asyncio.sleep", _fast_sleep)
+
+
+def _make_page(evaluate_return=None, goto_side_effect=None):
+    """Playwrightのページのモック（AsyncMockの子属性はそのままコルーチンとして振る舞う）"""
+    page = AsyncMock()
+    page.evaluate.return_value = evaluate_return if evaluate_return is not None else []
+    page.goto.side_effect = goto_side_effect
+    return page
+
+
 class TestExtractPrice:
     """価格抽出のテスト"""
     
@@ -39,9 +56,7 @@ class TestSearchAmazon:
     @pytest.mark.asyncio
     async def test_search_amazon_returns_results(self):
         """正常な検索結果が返ることをテスト"""
-        mock_page = AsyncMock()
-        mock_page.goto = AsyncMock()
-        mock_page.evaluate = AsyncMock(return_value=[
+        mock_page = _make_page(evaluate_return=[
             {
                 "title": "MacBook Air M2",
                 "price": "¥164,800",
@@ -49,25 +64,21 @@ class TestSearchAmazon:
                 "review": "4.5つ星"
             }
         ])
-        mock_page.close = AsyncMock()
         
         with patch("app.tools.product_search._create_page", return_value=mock_page):
-            with patch("asyncio.sleep", return_value=None):
-                results = await search_amazon.ainvoke({
-                    "query": "MacBook Air",
-                    "max_results": 5
-                })
-                
-                assert len(results) >= 1
-                assert results[0]["category"] == SearchResultCategory.PRODUCT.value
-                assert results[0]["details"]["source"] == "Amazon"
+            results = await search_amazon.ainvoke({
+                "query": "MacBook Air",
+                "max_results": 5
+            })
+            
+            assert len(results) >= 1
+            assert results[0]["category"] == SearchResultCategory.PRODUCT.value
+            assert results[0]["details"]["source"] == "Amazon"
     
     @pytest.mark.asyncio
     async def test_search_amazon_handles_error(self):
         """エラー時のハンドリング"""
-        mock_page = AsyncMock()
-        mock_page.goto = AsyncMock(side_effect=Exception("Network error"))
-        mock_page.close = AsyncMock()
+        mock_page = _make_page(goto_side_effect=Exception("Network error"))
         
         with patch("app.tools.product_search._create_page", return_value=mock_page):
             results = await search_amazon.ainvoke({
@@ -84,26 +95,22 @@ class TestSearchRakuten:
     @pytest.mark.asyncio
     async def test_search_rakuten_returns_results(self):
         """正常な検索結果が返ることをテスト"""
-        mock_page = AsyncMock()
-        mock_page.goto = AsyncMock()
-        mock_page.evaluate = AsyncMock(return_value=[
+        mock_page = _make_page(evaluate_return=[
             {
                 "title": "MacBook Air M2 ケース",
                 "price": "2,980円",
                 "url": "https://item.rakuten.co.jp/xxx"
             }
         ])
-        mock_page.close = AsyncMock()
         
         with patch("app.tools.product_search._create_page", return_value=mock_page):
-            with patch("asyncio.sleep", return_value=None):
-                results = await search_rakuten.ainvoke({
-                    "query": "MacBook Air ケース"
-                })
-                
-                assert len(results) >= 1
-                assert results[0]["category"] == SearchResultCategory.PRODUCT.value
-                assert results[0]["details"]["source"] == "楽天市場"
+            results = await search_rakuten.ainvoke({
+                "query": "MacBook Air ケース"
+            })
+            
+            assert len(results) >= 1
+            assert results[0]["category"] == SearchResultCategory.PRODUCT.value
+            assert results[0]["details"]["source"] == "楽天市場"
 
 
 class TestSearchKakaku:
@@ -112,26 +119,22 @@ class TestSearchKakaku:
     @pytest.mark.asyncio
     async def test_search_kakaku_returns_results(self):
         """正常な検索結果が返ることをテスト"""
-        mock_page = AsyncMock()
-        mock_page.goto = AsyncMock()
-        mock_page.evaluate = AsyncMock(return_value=[
+        mock_page = _make_page(evaluate_return=[
             {
                 "title": "Apple MacBook Air 13インチ",
                 "price": "¥148,000〜",
                 "url": "https://kakaku.com/item/xxx"
             }
         ])
-        mock_page.close = AsyncMock()
         
         with patch("app.tools.product_search._create_page", return_value=mock_page):
-            with patch("asyncio.sleep", return_value=None):
-                results = await search_kakaku.ainvoke({
-                    "query": "MacBook Air"
-                })
-                
-                assert len(results) >= 1
-                assert results[0]["category"] == SearchResultCategory.PRODUCT.value
-                assert results[0]["details"]["source"] == "価格.com"
+            results = await search_kakaku.ainvoke({
+                "query": "MacBook Air"
+            })
+            
+            assert len(results) >= 1
+            assert results[0]["category"] == SearchResultCategory.PRODUCT.value
+            assert results[0]["details"]["source"] == "価格.com"
 
 
 class TestSearchProducts:
@@ -140,23 +143,19 @@ class TestSearchProducts:
     @pytest.mark.asyncio
     async def test_search_products_combines_results(self):
         """複数サイトの結果が統合されることをテスト"""
-        mock_page = AsyncMock()
-        mock_page.goto = AsyncMock()
-        mock_page.evaluate = AsyncMock(return_value=[
+        mock_page = _make_page(evaluate_return=[
             {
                 "title": "Test Product",
                 "price": "10,000円",
                 "url": "https://example.com"
             }
         ])
-        mock_page.close = AsyncMock()
         
         with patch("app.tools.product_search._create_page", return_value=mock_page):
-            with patch("asyncio.sleep", return_value=None):
-                results = await search_products.ainvoke({
-                    "query": "テスト商品",
-                    "sites": ["amazon"],
-                    "max_results": 2
-                })
-                
-                assert len(results) >= 1
+            results = await search_products.ainvoke({
+                "query": "テスト商品",
+                "sites": ["amazon"],
+                "max_results": 2
+            })
+            
+            assert len(results) >= 1
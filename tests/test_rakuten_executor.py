@@ -1,6 +1,8 @@
 """
 Tests for Rakuten Executor
 """
+import contextlib
+
 import pytest
 from unittest.mock import AsyncMock, MagicMock, patch
 
@@ -9,6 +11,15 @@ from app.executors.base import ExecutorFactory
 from app.models.schemas import SearchResult, ExecutionResult
 
 
+# 統合テストでモックに差し替えるExecutorのメソッド
+_PATCHED_FLOW_METHODS = (
+    "_ensure_logged_in",
+    "_add_to_cart",
+    "_hide_floating_elements",
+    "_update_progress",
+)
+
+
 class TestRakutenExecutor:
     """RakutenExecutor のテスト"""
     
@@ -214,6 +225,7 @@ class TestRakutenExecutorWithMock:
         mock_page.evaluate.assert_called_once()
 
 
+@pytest.mark.integration
 class TestIntegrationRakutenExecutor:
     """統合テスト（実際のブラウザを使用しない）"""
     
@@ -240,11 +252,12 @@ class TestIntegrationRakutenExecutor:
             "password": "testpassword",
         }
         
-        with patch("app.executors.rakuten_executor.get_page") as mock_get_page, \
-             patch.object(executor, "_ensure_logged_in") as mock_login, \
-             patch.object(executor, "_add_to_cart") as mock_cart, \
-             patch.object(executor, "_hide_floating_elements") as mock_hide, \
-             patch.object(executor, "_update_progress") as mock_progress:
+        with contextlib.ExitStack() as stack:
+            mock_get_page = stack.enter_context(patch("app.executors.rakuten_executor.get_page"))
+            mocks = {
+                name: stack.enter_context(patch.object(executor, name))
+                for name in _PATCHED_FLOW_METHODS
+            }
             
             # モックの設定
             mock_page = AsyncMock()
@@ -252,8 +265,8 @@ class TestIntegrationRakutenExecutor:
             mock_page.goto = AsyncMock()
             mock_get_page.return_value = mock_page
             
-            mock_login.return_value = {"success": True, "message": "ログイン成功"}
-            mock_cart.return_value = {"success": True, "message": "カートに追加しました"}
+            mocks["_ensure_logged_in"].return_value = {"success": True, "message": "ログイン成功"}
+            mocks["_add_to_cart"].return_value = {"success": True, "message": "カートに追加しました"}
             
             # 実行
             result = await executor._do_execute(
@@ -270,7 +283,7 @@ class TestIntegrationRakutenExecutor:
             assert "cart_url" in result.details
             
             # フローティング要素の非表示が呼ばれたか確認
-            mock_hide.assert_called_once()
+            mocks["_hide_floating_elements"].assert_called_once()
             
             # 進捗更新が呼ばれたか確認
-            assert mock_progress.call_count >= 4  # 少なくとも4つのステップ
+            assert mocks["_update_progress"].call_count >= 4  # 少なくとも4つのステップ
@@ -3,23 +3,15 @@ Phase 10: Voice Communication API Tests
 音声通話APIのテスト
 """
 import pytest
-from fastapi.testclient import TestClient
 from unittest.mock import AsyncMock, patch, MagicMock
 from datetime import datetime
 
-from main import app
 from app.models.voice_schemas import (
     CallDirection, CallStatus, CallPurpose, PhoneRuleType,
     VoiceSettingsResponse, PhoneNumberRuleResponse, VoiceCallResponse,
 )
 
 
-@pytest.fixture
-def client():
-    """テストクライアント"""
-    return TestClient(app)
-
-
 @pytest.fixture
 def mock_voice_service():
     """VoiceServiceのモック"""